@@ -0,0 +1,121 @@
+import sqlite3
+import time
+from Database.db_manager import get_read_connection, run_write, run_async
+
+# Repository calls slower than this are reported (SQL-level detail: query_profiler)
+SLOW_CALL_MS = 250
+# Ids per IN (...) list; stays under SQLite's default 999 bound parameters
+ID_CHUNK_SIZE = 500
+
+
+class BaseRepository:
+    """
+    Shared plumbing for every repository.
+
+    Owns the connection lifecycle (reads on the read-only pool, writes through
+    run_write()), row mapping, timing and error reporting, so each repository
+    method only states its SQL. On failure the error is printed and the
+    method's default is returned, matching the repositories' public contract.
+    """
+
+    @classmethod
+    def _map_row_to_object(cls, row):
+        return row
+
+    @classmethod
+    def _report(cls, action, error):
+        print(f"❌ {cls.__name__}: error {action}: {error}")
+
+    @classmethod
+    def _timed(cls, action, started):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms > SLOW_CALL_MS:
+            print(f"🐢 {cls.__name__}: {action} took {elapsed_ms:.0f} ms")
+
+    # =========================
+    # Reads
+    # =========================
+    @classmethod
+    def _read(cls, work, action, default=None, scoped=True):
+        # Runs work(conn) on a read-only connection (scoped: see get_read_connection).
+        conn = None
+        started = time.perf_counter()
+        try:
+            conn = get_read_connection(scoped=scoped)
+            return work(conn)
+        except Exception as e:
+            cls._report(action, e)
+            return default
+        finally:
+            if conn: conn.close()
+            cls._timed(action, started)
+
+    @classmethod
+    def _fetch_one(cls, sql, params=(), action="fetching row", mapper=None, raw=False):
+        def work(conn):
+            row = conn.execute(sql, params).fetchone()
+            if raw or row is None:
+                return row
+            return (mapper or cls._map_row_to_object)(row)
+        return cls._read(work, action, default=None)
+
+    @classmethod
+    def _fetch_all(cls, sql, params=(), action="fetching rows", mapper=None, raw=False):
+        def work(conn):
+            rows = conn.execute(sql, params).fetchall()
+            if raw:
+                return rows
+            map_row = mapper or cls._map_row_to_object
+            return [map_row(row) for row in rows]
+        return cls._read(work, action, default=[])
+
+    @staticmethod
+    def _id_chunks(ids):
+        # (chunk, "?, ?, ...") pairs covering ids, ID_CHUNK_SIZE at a time
+        ids = list(ids)
+        for start in range(0, len(ids), ID_CHUNK_SIZE):
+            chunk = ids[start:start + ID_CHUNK_SIZE]
+            yield chunk, ", ".join("?" for _ in chunk)
+
+    @classmethod
+    def _fetch_value(cls, sql, params=(), action="fetching value", default=None):
+        def work(conn):
+            row = conn.execute(sql, params).fetchone()
+            return row[0] if row is not None else default
+        return cls._read(work, action, default=default)
+
+    # =========================
+    # Writes
+    # =========================
+    @classmethod
+    def _write(cls, job, action, default=False, integrity_message=None):
+        # Runs job(conn) in a write transaction (see db_manager.run_write).
+        started = time.perf_counter()
+        try:
+            return run_write(job)
+        except sqlite3.IntegrityError as e:
+            if integrity_message:
+                print(f"⚠️ {integrity_message}")
+            else:
+                cls._report(action, e)
+            return default
+        except Exception as e:
+            cls._report(action, e)
+            return default
+        finally:
+            cls._timed(action, started)
+
+    @classmethod
+    def _execute(cls, sql, params=(), action="writing", default=False, integrity_message=None):
+        # Single statement write; returns the affected row count.
+        return cls._write(lambda conn: conn.execute(sql, params).rowcount,
+                          action, default=default, integrity_message=integrity_message)
+
+    # =========================
+    # Async
+    # =========================
+    @classmethod
+    def _async(cls, method, *args, **kwargs):
+        # Awaitable form of a repository method for async views: runs on the
+        # bounded async executor with its own connections (db_manager.run_async).
+        return run_async(method, *args, **kwargs)
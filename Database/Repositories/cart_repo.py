@@ -1,132 +1,262 @@
-import sqlite3
-from Database.db_manager import get_connection
+from Database.Repositories.base_repo import BaseRepository
 from models.shopping_cart import ShoppingCart
 from models.cart_item import CartItem
-from Database.Repositories.product_repo import ProductRepository
+from models.product_model import Product
 
-class CartRepository:
-    @staticmethod
-    def _map_row_to_object(row, user_object):
+# Guest carts untouched for this long are deleted (prune_guest_carts)
+GUEST_CART_TTL_DAYS = 30
+# Operations accepted by apply_batch / apply_guest_batch
+BATCH_OPS = ("set", "add", "remove", "clear")
+
+# A cart's lines joined with their products (see _read_cart)
+USER_CART_SQL = """
+SELECT ci.id AS cart_item_id, ci.quantity AS cart_quantity, p.*
+FROM cart_items ci
+JOIN products p ON p.id = ci.product_id
+WHERE ci.user_id = ?
+ORDER BY ci.id
+"""
+GUEST_CART_SQL = """
+SELECT NULL AS cart_item_id, g.quantity AS cart_quantity, p.*
+FROM guest_cart_items g
+JOIN products p ON p.id = g.product_id
+WHERE g.token = ?
+ORDER BY g.added_at
+"""
+
+class CartRepository(BaseRepository):
+    @classmethod
+    def _map_row_to_object(cls, row, user_object=None):
+        # row: a cart line joined with its product (see get_cart_by_user)
         if not row:
-            return None      
-        product = ProductRepository.get_product_by_id(row['product_id'])
-        
-        if product:
-            return CartItem(
-                item_id=row['id'],
-                user=user_object,
-                product=product,
-                quantity=row['quantity']
-            )
-        return None
-
-    @staticmethod
-    def get_cart_by_user(user_object):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            sql = "SELECT * FROM cart_items WHERE user_id = ?"
-            cursor.execute(sql, (user_object.id,))
-            rows = cursor.fetchall()
-            cart = ShoppingCart(user_object)
-            for row in rows:
-                item = CartRepository._map_row_to_object(row, user_object)
-                if item:
-                    cart._items.append(item)     
-            return cart
-
-        except Exception as e:
-            print(f"❌ Error fetching cart: {e}")
             return None
-        finally:
-            if conn: conn.close()
-
-    @staticmethod
-    def update_quantity(user_id, product_id, new_quantity):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            sql = "UPDATE cart_items SET quantity = ? WHERE user_id = ? AND product_id = ?"
-            cursor.execute(sql, (new_quantity, user_id, product_id))
-            conn.commit()
-            return cursor.rowcount > 0
-        except Exception as e:
-            print(f"❌ Error updating quantity: {e}")
-            return False
-        finally:
-            if conn: conn.close()
-
-    @staticmethod
-    def add_or_update_item(user_id, product_id, quantity):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            # 1. Check Product Stock
-            product = ProductRepository.get_product_by_id(product_id)
-            if not product:
-                print("❌ Product not found.")
-                return False
-                
-            # 2. Check Existing Cart Quantity
-            check_sql = "SELECT quantity FROM cart_items WHERE user_id = ? AND product_id = ?"
-            cursor.execute(check_sql, (user_id, product_id))
-            existing = cursor.fetchone()
-            
-            # Calculate Projected Total
-            current_cart_qty = existing['quantity'] if existing else 0
-            new_total_qty = current_cart_qty + quantity
-            
-            # 3. Validate Stock
-            if new_total_qty > product.stock_quantity:
-                print(f"❌ Insufficient stock. Requested: {new_total_qty}, Available: {product.stock_quantity}")
-                return False
-
-            # 4. Proceed to Update or Insert
-            if existing:
-                return CartRepository.update_quantity(user_id, product_id, new_total_qty)
-            else:
-                insert_sql = "INSERT INTO cart_items (user_id, product_id, quantity) VALUES (?, ?, ?)"
-                cursor.execute(insert_sql, (user_id, product_id, quantity))
-                conn.commit()
-                return True
-        except Exception as e:
-            print(f"❌ Error adding item: {e}")
-            return False
-        finally:
-            if conn: conn.close()
-
-    @staticmethod
-    def remove_item(user_id, product_id):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            sql = "DELETE FROM cart_items WHERE user_id = ? AND product_id = ?"
-            cursor.execute(sql, (user_id, product_id))
-            conn.commit()
-            return True
-        except Exception as e:
-            print(f"❌ Error removing item: {e}")
+        return CartItem(
+            item_id=row['cart_item_id'],
+            user=user_object,
+            product=Product.from_row(row),
+            quantity=row['cart_quantity']
+        )
+
+    @classmethod
+    def _read_cart(cls, conn, line_sql, owner, user_object):
+        # Lines and their products in one query, however big the cart. Bypasses
+        # the catalog cache on purpose: checkout needs the current stock.
+        cart = ShoppingCart(user_object)
+        for row in conn.execute(line_sql, (owner,)).fetchall():
+            cart._add_item(cls._map_row_to_object(row, user_object))
+        return cart
+
+    @classmethod
+    def _load_cart(cls, line_sql, owner, user_object, action):
+        return cls._read(lambda conn: cls._read_cart(conn, line_sql, owner, user_object),
+                         action=action, default=None)
+
+    @classmethod
+    def get_cart_by_user(cls, user_object):
+        return cls._load_cart(USER_CART_SQL, user_object.id, user_object, action="fetching cart")
+
+    @classmethod
+    def update_quantity(cls, user_id, product_id, new_quantity):
+        sql = "UPDATE cart_items SET quantity = ? WHERE user_id = ? AND product_id = ?"
+        return cls._execute(sql, (new_quantity, user_id, product_id), action="updating quantity") > 0
+
+    @classmethod
+    def _add_line(cls, sql, owner, product_id, quantity):
+        # sql: a stock-checked upsert of one line (see add_or_update_item)
+        if quantity < 1:
             return False
-        finally:
-            if conn: conn.close()
-
-    @staticmethod
-    def clear_cart(user_id):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            sql = "DELETE FROM cart_items WHERE user_id = ?"
-            cursor.execute(sql, (user_id,))
-            conn.commit()
-            return True
-        except Exception as e:
-            print(f"❌ Error clearing cart: {e}")
+
+        def job(conn):
+            row = conn.execute(sql, (owner, quantity, product_id, quantity)).fetchone()
+            return row['quantity'] if row else None
+
+        new_quantity = cls._write(job, action="adding item", default=None)
+        if new_quantity is None:
+            print(f"❌ Could not add product {product_id}: not found or insufficient stock.")
             return False
-        finally:
-            if conn: conn.close()
\ No newline at end of file
+        return new_quantity
+
+    @classmethod
+    def add_or_update_item(cls, user_id, product_id, quantity):
+        """
+        Adds quantity of a product to the user's cart in a single statement: the
+        line is inserted, or its quantity raised, only while the new total stays
+        within stock. Returns the line's resulting quantity, or False when the
+        product does not exist or there is not enough stock.
+        """
+        # Stock is checked in the same statement as the write (unique cart line
+        # from migration 0010), so concurrent clicks cannot overshoot it.
+        sql = """
+        INSERT INTO cart_items (user_id, product_id, quantity)
+        SELECT ?, p.id, ? FROM products p
+        WHERE p.id = ? AND ? <= p.stock_quantity
+        ON CONFLICT (user_id, product_id) DO UPDATE SET quantity = cart_items.quantity + excluded.quantity
+        WHERE cart_items.quantity + excluded.quantity <= (
+            SELECT stock_quantity FROM products WHERE id = excluded.product_id
+        )
+        RETURNING quantity
+        """
+        return cls._add_line(sql, user_id, product_id, quantity)
+
+    @classmethod
+    def remove_item(cls, user_id, product_id):
+        sql = "DELETE FROM cart_items WHERE user_id = ? AND product_id = ?"
+        return cls._execute(sql, (user_id, product_id), action="removing item") is not False
+
+    @classmethod
+    def clear_cart(cls, user_id):
+        sql = "DELETE FROM cart_items WHERE user_id = ?"
+        return cls._execute(sql, (user_id,), action="clearing cart") is not False
+
+    # =========================
+    # Guest carts (anonymous visitors, keyed by the session's cart token)
+    # =========================
+    @classmethod
+    def get_guest_cart(cls, token):
+        return cls._load_cart(GUEST_CART_SQL, token, None, action="fetching guest cart")
+
+    @classmethod
+    def add_guest_item(cls, token, product_id, quantity):
+        """Same contract as add_or_update_item, for a guest cart."""
+        sql = """
+        INSERT INTO guest_cart_items (token, product_id, quantity)
+        SELECT ?, p.id, ? FROM products p
+        WHERE p.id = ? AND ? <= p.stock_quantity
+        ON CONFLICT (token, product_id) DO UPDATE SET
+            quantity = guest_cart_items.quantity + excluded.quantity,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE guest_cart_items.quantity + excluded.quantity <= (
+            SELECT stock_quantity FROM products WHERE id = excluded.product_id
+        )
+        RETURNING quantity
+        """
+        return cls._add_line(sql, token, product_id, quantity)
+
+    @classmethod
+    def remove_guest_item(cls, token, product_id):
+        sql = "DELETE FROM guest_cart_items WHERE token = ? AND product_id = ?"
+        return cls._execute(sql, (token, product_id), action="removing guest item") is not False
+
+    @classmethod
+    def clear_guest_cart(cls, token):
+        sql = "DELETE FROM guest_cart_items WHERE token = ?"
+        return cls._execute(sql, (token,), action="clearing guest cart") is not False
+
+    @classmethod
+    def merge_guest_cart(cls, token, user_id):
+        """
+        Moves a guest cart into the user's cart in one transaction (on login).
+        Quantities add up and are capped at the current stock; out-of-stock
+        lines are dropped. Returns the number of lines merged, or False.
+        """
+        merge_sql = """
+        INSERT INTO cart_items (user_id, product_id, quantity)
+        SELECT ?, g.product_id, MIN(g.quantity, p.stock_quantity)
+        FROM guest_cart_items g
+        JOIN products p ON p.id = g.product_id
+        WHERE g.token = ? AND p.stock_quantity > 0
+        ON CONFLICT (user_id, product_id) DO UPDATE SET quantity = MIN(
+            cart_items.quantity + excluded.quantity,
+            (SELECT stock_quantity FROM products WHERE id = excluded.product_id)
+        )
+        """
+
+        def job(conn):
+            merged = conn.execute(merge_sql, (user_id, token)).rowcount
+            conn.execute("DELETE FROM guest_cart_items WHERE token = ?", (token,))
+            return merged
+
+        return cls._write(job, action="merging guest cart")
+
+    @classmethod
+    def prune_guest_carts(cls, older_than_days=GUEST_CART_TTL_DAYS):
+        # Guest carts nobody touched for a while (their cookie is long gone)
+        sql = "DELETE FROM guest_cart_items WHERE updated_at < datetime('now', ?)"
+        return cls._execute(sql, (f"-{int(older_than_days)} days",), action="pruning guest carts")
+
+    # =========================
+    # Batch changes (several operations, one transaction)
+    # =========================
+    @classmethod
+    def _apply_batch(cls, table, owner_column, owner, ops, line_sql, user_object, touch=""):
+        """
+        Applies ops in order to a working copy of the cart's lines, checks the
+        stock of every line they change with one products query, and writes
+        the result in the same transaction. All or nothing: if any changed line
+        is over stock or names an unknown product, nothing is written.
+        Returns (cart, errors); cart is the cart as stored after the call.
+        """
+        upsert_sql = f"""
+        INSERT INTO {table} ({owner_column}, product_id, quantity) VALUES (?, ?, ?)
+        ON CONFLICT ({owner_column}, product_id) DO UPDATE SET quantity = excluded.quantity{touch}
+        """
+        delete_sql = f"DELETE FROM {table} WHERE {owner_column} = ? AND product_id = ?"
+
+        def job(conn):
+            current = dict(conn.execute(
+                f"SELECT product_id, quantity FROM {table} WHERE {owner_column} = ?", (owner,)
+            ).fetchall())
+            lines = dict(current)
+            for op, product_id, quantity in ops:
+                if op == "clear":
+                    lines.clear()
+                elif op == "remove" or (op == "set" and quantity < 1):
+                    lines.pop(product_id, None)
+                elif op == "set":
+                    lines[product_id] = quantity
+                elif op == "add":
+                    lines[product_id] = lines.get(product_id, 0) + quantity
+
+            changed = {pid: qty for pid, qty in lines.items() if current.get(pid) != qty}
+            stock = {}
+            for chunk, marks in cls._id_chunks(changed):
+                stock.update(conn.execute(
+                    f"SELECT id, stock_quantity FROM products WHERE id IN ({marks})", chunk
+                ).fetchall())
+
+            errors = []
+            for product_id, quantity in changed.items():
+                if product_id not in stock:
+                    errors.append({"product_id": product_id, "error": "Product not found."})
+                elif quantity > (stock[product_id] or 0):
+                    errors.append({"product_id": product_id, "requested": quantity,
+                                   "available": stock[product_id] or 0,
+                                   "error": "Not enough stock available."})
+
+            if not errors:
+                removed = [(owner, pid) for pid in current if pid not in lines]
+                conn.executemany(delete_sql, removed)
+                conn.executemany(upsert_sql, [(owner, pid, qty) for pid, qty in changed.items()])
+            return cls._read_cart(conn, line_sql, owner, user_object), errors
+
+        return cls._write(job, action="applying cart batch", default=(None, None))
+
+    @classmethod
+    def apply_batch(cls, user_object, ops):
+        """
+        ops: [(op, product_id, quantity), ...] with op one of BATCH_OPS
+        ("set" to 0 removes the line; "clear" ignores product_id and quantity).
+        Returns (cart, errors), or (None, None) on a database error.
+        """
+        return cls._apply_batch("cart_items", "user_id", user_object.id, ops, USER_CART_SQL, user_object)
+
+    @classmethod
+    def apply_guest_batch(cls, token, ops):
+        """Same contract as apply_batch, for a guest cart."""
+        return cls._apply_batch("guest_cart_items", "token", token, ops, GUEST_CART_SQL, None,
+                                touch=", updated_at = CURRENT_TIMESTAMP")
+
+    # =========================
+    # Async variants (for async views)
+    # =========================
+    @classmethod
+    async def aget_cart_by_user(cls, user_object):
+        return await cls._async(cls.get_cart_by_user, user_object)
+
+    @classmethod
+    async def aadd_or_update_item(cls, user_id, product_id, quantity):
+        return await cls._async(cls.add_or_update_item, user_id, product_id, quantity)
+
+    @classmethod
+    async def aclear_cart(cls, user_id):
+        return await cls._async(cls.clear_cart, user_id)
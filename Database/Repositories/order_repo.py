@@ -1,148 +1,215 @@
-import sqlite3
-from Database.db_manager import get_connection
+from Database.Repositories.base_repo import BaseRepository
+from Database.db_manager import order_archive
+from Database.Repositories.product_repo import ProductRepository
 
-class OrderRepository:
-    @staticmethod
-    def create_order(user_id, cart_items, total_amount, shipping_address, payment_method="Cash", status="Pending", cursor=None):
+# Newest first; id breaks ties between orders placed in the same second
+ORDER_SORT = "created_at DESC, id DESC"
+
+class OrderRepository(BaseRepository):
+    @classmethod
+    def create_order(cls, user_id, cart_items, total_amount, shipping_address, payment_method="Cash", status="Pending", cursor=None):
         """
         Creates an order in the database.
         Args:
             cursor: Optional database cursor. If provided, assumes caller handles commit/rollback.
         """
-        conn = None
-        should_close_conn = False
-        
-        try:
-            if cursor is None:
-                conn = get_connection()
-                cursor = conn.cursor()
-                should_close_conn = True
-            
+        def insert(cursor):
             # 1. Insert Order
             sql_order = """
             INSERT INTO orders (user_id, total_amount, shipping_address, payment_method, status)
             VALUES (?, ?, ?, ?, ?)
             """
             cursor.execute(sql_order, (user_id, total_amount, shipping_address, payment_method, status))
-            
+
             order_id = cursor.lastrowid
-            
+
             # 2. Insert Order Items
             sql_item = """
             INSERT INTO order_items (order_id, product_id, quantity, price_at_purchase)
             VALUES (?, ?, ?, ?)
             """
-            
+
+            rows = []
             for item in cart_items:
-                # Handle both dict (from db cart) and object (from request) if needed
-                # Current usage in checkout is objects, but this repo signature expects items list 
-                # Let's standardize the input expectation. 
-                # If item is dict (old way):
+                # Accept both dicts (old way) and OrderItem objects
                 p_id = item.get('product_id') if isinstance(item, dict) else item.product_id
                 qty = item.get('quantity') if isinstance(item, dict) else item.quantity
                 price = item.get('price') if isinstance(item, dict) else (item.unit_price if hasattr(item, 'unit_price') else 0)
-                
-                cursor.execute(sql_item, (order_id, p_id, qty, price))
-            
-            if should_close_conn:
-                conn.commit()
-                print(f"✅ Order #{order_id} created successfully.")
-            
+                rows.append((order_id, p_id, qty, price))
+
+            cursor.executemany(sql_item, rows)
             return order_id
-            
-        except Exception as e:
-            if should_close_conn and conn:
-                conn.rollback()
-            print(f"❌ Error creating order: {e}")
-            # If we are part of a transaction (external cursor), we should re-raise the exception
-            # so the caller knows to rollback too.
-            if not should_close_conn:
-                raise e
-            return None
-        finally:
-            if should_close_conn and conn:
-                conn.close()
 
-    @staticmethod
-    def get_user_orders(user_id):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            sql = "SELECT * FROM orders WHERE user_id = ? ORDER BY created_at DESC"
-            cursor.execute(sql, (user_id,))
-            orders = cursor.fetchall()
-            return orders
-        except Exception as e:
-            print(f"❌ Error fetching orders: {e}")
-            return []
-        finally:
-            if conn:
-                conn.close()
+        if cursor is not None:
+            # Part of the caller's transaction: re-raise so the caller rolls back too.
+            try:
+                return insert(cursor)
+            except Exception as e:
+                print(f"❌ Error creating order: {e}")
+                raise
 
+        order_id = cls._write(lambda conn: insert(conn.cursor()), action="creating order", default=None)
+        if order_id:
+            print(f"✅ Order #{order_id} created successfully.")
+        return order_id
+
+    # =========================
+    # Reads (hot tables + archived partitions)
+    # =========================
     @staticmethod
-    def get_order_details(order_id):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            sql = """
-            SELECT oi.quantity, oi.price_at_purchase, p.name, p.image_url
-            FROM order_items oi
-            JOIN products p ON oi.product_id = p.id
-            WHERE oi.order_id = ?
-            """
-            cursor.execute(sql, (order_id,))
-            items = cursor.fetchall()
-            return items
-        except Exception as e:
-            print(f"❌ Error fetching order details: {e}")
-            return []
-        finally:
-            if conn:
-                conn.close()
+    def _date_range(since, until, column="created_at"):
+        # Optional 'YYYY-MM-DD[ HH:MM:SS]' bounds; a bare 'until' date covers that whole day
+        clause, params = "", []
+        if since:
+            clause += f" AND {column} >= ?"
+            params.append(since)
+        if until:
+            if len(until) == 10:
+                until += " 23:59:59"
+            clause += f" AND {column} <= ?"
+            params.append(until)
+        return clause, params, since or None, until or None
 
     @staticmethod
-    def get_all_orders():
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            # بنعمل JOIN عشان نجيب اسم العميل مع الاوردر
-            sql = """
-            SELECT o.*, u.username 
-            FROM orders o 
-            JOIN users u ON o.user_id = u.id 
-            ORDER BY o.created_at DESC
-            """
-            cursor.execute(sql)
-            rows = cursor.fetchall()
-            return rows # هنرجع الصفوف خام ونتعامل معاها في الروت
-            
-        except Exception as e:
-            print(f"❌ Error fetching all orders: {e}")
-            return []
-        finally:
-            if conn: conn.close()
+    def _read_by_order_id(conn, sql, order_id):
+        # Hot tables first; archived orders are found through their partition's id range
+        rows = order_archive.read(conn, sql, (order_id,))
+        if not rows:
+            partitions = order_archive.partitions_for_order(conn, order_id)
+            if partitions:
+                rows = order_archive.read(conn, sql, (order_id,), partitions)
+        return rows
 
+    @classmethod
+    def get_user_orders(cls, user_id, since=None, until=None):
+        # Hot orders only, unless since / until reach into archived months
+        clause, params, since, until = cls._date_range(since, until)
+        sql = (
+            "SELECT id, user_id, total_amount, shipping_address, payment_method, status, created_at, "
+            "{archived} AS archived FROM {schema}.orders WHERE user_id = ?" + clause
+        )
 
-    @staticmethod
-    def update_order_status(order_id, new_status):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            sql = "UPDATE orders SET status = ? WHERE id = ?"
-            cursor.execute(sql, (new_status, order_id))
-            conn.commit()
-            
-            return cursor.rowcount > 0
-        except Exception as e:
-            print(f"❌ Error updating order status: {e}")
-            return False
-        finally:
-            if conn: conn.close()
\ No newline at end of file
+        def work(conn):
+            partitions = order_archive.partitions(conn, since, until)
+            return order_archive.read(
+                conn, sql, (user_id, *params), partitions, order_by=ORDER_SORT,
+                sort_key=lambda row: (row['created_at'], row['id']), reverse=True
+            )
+
+        return cls._read(work, action="fetching orders", default=[])
+
+    @classmethod
+    def get_order(cls, order_id):
+        sql = (
+            "SELECT id, user_id, total_amount, shipping_address, payment_method, status, created_at, "
+            "{archived} AS archived FROM {schema}.orders WHERE id = ?"
+        )
+
+        def work(conn):
+            rows = cls._read_by_order_id(conn, sql, order_id)
+            return rows[0] if rows else None
+
+        return cls._read(work, action=f"fetching order {order_id}", default=None)
+
+    @classmethod
+    def get_order_items(cls, order_id):
+        sql = "SELECT product_id, quantity, price_at_purchase FROM {schema}.order_items WHERE order_id = ?"
+        return cls._read(lambda conn: cls._read_by_order_id(conn, sql, order_id),
+                         action="fetching order items", default=[])
+
+    @classmethod
+    def get_order_details(cls, order_id):
+        return cls.get_order_details_by_ids([order_id]).get(order_id, [])
+
+    @classmethod
+    def get_order_details_by_ids(cls, order_ids):
+        """
+        {order_id: [item, ...]} for many orders at once: one order_items query per
+        ID_CHUNK_SIZE orders (archived partitions only for ids not found hot) and
+        one batched product lookup. Items are dicts with product_id, quantity,
+        price_at_purchase, name and image_url; lines whose product was deleted are
+        left out.
+        """
+        order_ids = list(dict.fromkeys(order_ids))
+        sql = "SELECT order_id, product_id, quantity, price_at_purchase FROM {schema}.order_items WHERE order_id IN ({marks})"
+
+        def work(conn):
+            rows = []
+            for chunk, marks in cls._id_chunks(order_ids):
+                query = sql.replace("{marks}", marks)
+                found = order_archive.read(conn, query, chunk)
+                missing = set(chunk) - {row['order_id'] for row in found}
+                if missing:
+                    partitions = order_archive.partitions_for_orders(conn, missing)
+                    if partitions:
+                        found = order_archive.read(conn, query, chunk, partitions)
+                rows.extend(found)
+            return rows
+
+        rows = cls._read(work, action=f"fetching details of {len(order_ids)} orders", default=[])
+        products = ProductRepository.get_products_by_ids(row['product_id'] for row in rows)
+
+        details = {order_id: [] for order_id in order_ids}
+        for row in rows:
+            product = products.get(row['product_id'])
+            if product:
+                details[row['order_id']].append({
+                    'product_id': row['product_id'],
+                    'quantity': row['quantity'],
+                    'price_at_purchase': row['price_at_purchase'],
+                    'name': product.name,
+                    'image_url': product.image_url,
+                })
+        return details
+
+    @classmethod
+    def get_order_stats(cls):
+        """
+        {'orders': count, 'revenue': sum of total_amount} over hot and archived
+        orders: one aggregate on the hot table plus the per-month totals kept in
+        order_partitions, so no order row is loaded and no archive is attached.
+        """
+        def work(conn):
+            orders, revenue = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(total_amount), 0) FROM orders"
+            ).fetchone()
+            archived_orders, archived_revenue = order_archive.totals(conn)
+            return {'orders': orders + archived_orders, 'revenue': revenue + archived_revenue}
+
+        return cls._read(work, action="fetching order stats", default={'orders': 0, 'revenue': 0})
+
+    @classmethod
+    def get_all_orders(cls, since=None, until=None):
+        # Same rule as get_user_orders: archives are attached only for a date range
+        clause, params, since, until = cls._date_range(since, until, column="o.created_at")
+        # بنعمل JOIN عشان نجيب اسم العميل مع الاوردر
+        sql = (
+            "SELECT o.id, o.user_id, o.total_amount, o.shipping_address, o.payment_method, o.status, "
+            "o.created_at, u.username, {archived} AS archived "
+            "FROM {schema}.orders o JOIN main.users u ON o.user_id = u.id WHERE 1 = 1" + clause
+        )
+
+        def work(conn):
+            partitions = order_archive.partitions(conn, since, until)
+            return order_archive.read(
+                conn, sql, params, partitions, order_by=ORDER_SORT,
+                sort_key=lambda row: (row['created_at'], row['id']), reverse=True
+            )
+
+        return cls._read(work, action="fetching all orders", default=[]) # هنرجع الصفوف خام ونتعامل معاها في الروت
+
+    @classmethod
+    def update_order_status(cls, order_id, new_status):
+        sql = "UPDATE orders SET status = ? WHERE id = ?"
+        return cls._execute(sql, (new_status, order_id), action="updating order status") > 0
+
+    # =========================
+    # Async variants (for async views)
+    # =========================
+    @classmethod
+    async def aget_user_orders(cls, user_id, since=None, until=None):
+        return await cls._async(cls.get_user_orders, user_id, since, until)
+
+    @classmethod
+    async def aget_order_details(cls, order_id):
+        return await cls._async(cls.get_order_details, order_id)
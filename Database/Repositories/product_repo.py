@@ -1,297 +1,597 @@
-import sqlite3
+import base64
 import json
-from Database.db_manager import get_connection
+import re
+import sqlite3
+from collections import namedtuple
+from markupsafe import Markup, escape
+from Database.Repositories.base_repo import BaseRepository
+from Database.catalog_cache import catalog_cache
 from models.product_model import Product
 
 
 ALLOWED_SORT_COLUMNS = ["price", "name", "created_at", "stock_quantity"]
 ALLOWED_SORT_TYPES = ["ASC", "DESC"]
 
-class ProductRepository:
+# Keyset pagination (get_*_page)
+DEFAULT_PAGE_SIZE = 12
+MAX_PAGE_SIZE = 100
+
+# bm25 column weights for products_fts: name, category, details values
+SEARCH_WEIGHTS = (10.0, 4.0, 1.0)
+# Match markers from highlight()/snippet(), turned into <mark> after HTML escaping
+HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE = "\x02", "\x03"
+
+# One search result: the product plus its highlighted name / details snippet (Markup)
+SearchHit = namedtuple("SearchHit", "product name_html snippet_html score")
+
+# Attribute filtering: values listed per facet (most common first)
+FACET_VALUE_LIMIT = 20
+
+# filter_products() result: one keyset page, facet counts {name: [(value, count)]}, cursor
+FilterResult = namedtuple("FilterResult", "products facets next_cursor")
+
+# One row of the trigger-maintained categories table
+CategorySummary = namedtuple("CategorySummary", "name product_count in_stock_count min_price max_price")
+
+class ProductRepository(BaseRepository):
 
     # =========================================================
     # Helper: Convert a Row into an Object
     # =========================================================
-
-    # testing comment
-    @staticmethod
-    def _map_row_to_object(row):
+    @classmethod
+    def _map_row_to_object(cls, row):
         if not row:
             return None
-        return Product(
-            id=row['id'],
-            name=row['name'],
-            price=row['price'],
-            image_url=row['image_url'],
-            category=row['category'],
-            stock_quantity=row['stock_quantity'],
-            details=row['details'],  
-            created_at=row['created_at']
-        )
+        return Product.from_row(row)
+
+    @staticmethod
+    def _normalize_sort(ordered_by, sort_type):
+        if ordered_by not in ALLOWED_SORT_COLUMNS: ordered_by = "created_at"
+        if sort_type not in ALLOWED_SORT_TYPES: sort_type = "DESC"
+        return ordered_by, sort_type
 
     # =========================================================
     # Create: Add a Product (Using an Object)
     # =========================================================
-    @staticmethod
-    def add_product(product_object):
-       
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
+    @classmethod
+    def add_product(cls, product_object):
+        details_json = json.dumps(product_object.details) if product_object.details else "{}"
 
-            
-            details_json = json.dumps(product_object.details) if product_object.details else "{}"
+        sql = """
+        INSERT INTO products (name, price, image_url, category, stock_quantity, details)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """
+        params = (
+            product_object.name,
+            product_object.price,
+            product_object.image_url,
+            product_object.category,
+            product_object.stock_quantity,
+            details_json
+        )
 
-            sql = """
-            INSERT INTO products (name, price, image_url, category, stock_quantity, details)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """
-            
-            
-            cursor.execute(sql, (
-                product_object.name, 
-                product_object.price, 
-                product_object.image_url, 
-                product_object.category, 
-                product_object.stock_quantity, 
-                details_json
-            ))
-
-            conn.commit()
-            print(f" Product '{product_object.name}' added successfully.")
-            return True
-            
-        except Exception as e:
-            print(f" Error adding Product: {e}")
+        if cls._execute(sql, params, action=f"adding product '{product_object.name}'") is False:
             return False
-        finally:
-            if conn: conn.close()
+        catalog_cache.invalidate()
+        print(f" Product '{product_object.name}' added successfully.")
+        return True
+
+    # =========================================================
+    # Versions: HTTP validators (routes/http_cache.py)
+    # =========================================================
+    @classmethod
+    def get_catalog_version(cls):
+        """(version, changed_at) of the latest catalog change: (0, None) before any, (None, None) on error."""
+        def work(conn):
+            row = conn.execute("SELECT version, changed_at FROM catalog_changes ORDER BY version DESC LIMIT 1").fetchone()
+            return (row[0], row[1]) if row else (0, None)
+        return cls._read(work, action="fetching catalog version", default=(None, None))
+
+    @classmethod
+    def get_product_version(cls, product_id):
+        """
+        (version, changed_at) of the product's latest change. A product whose
+        changes were pruned from the log gets the version just below the oldest
+        entry left, which still only grows.
+        """
+        def work(conn):
+            row = conn.execute(
+                "SELECT version, changed_at FROM catalog_changes WHERE product_id = ? ORDER BY version DESC LIMIT 1",
+                (product_id,)
+            ).fetchone()
+            if row is None:
+                row = conn.execute("SELECT COALESCE(MIN(version) - 1, 0), MIN(changed_at) FROM catalog_changes").fetchone()
+            return row[0], row[1]
+        return cls._read(work, action=f"fetching version of product {product_id}", default=(None, None))
+
+    # =========================================================
+    # Bulk: Batched Upsert / Streaming Read (Database/catalog_io.py)
+    # =========================================================
+    BULK_UPSERT_SQL = """
+    INSERT INTO products (id, name, price, image_url, category, stock_quantity, details)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        name = excluded.name,
+        price = excluded.price,
+        image_url = excluded.image_url,
+        category = excluded.category,
+        stock_quantity = excluded.stock_quantity,
+        details = excluded.details
+    """
+
+    @classmethod
+    def bulk_upsert(cls, rows):
+        """
+        Writes (id, name, price, image_url, category, stock_quantity, details_json)
+        rows in one transaction; a row with an id updates that product, id None
+        inserts. Returns {row index: error} for rows the database rejected (the
+        others are still written), or None if the transaction itself failed.
+        """
+        def job(conn):
+            conn.execute("SAVEPOINT bulk_upsert")
+            try:
+                conn.executemany(cls.BULK_UPSERT_SQL, rows)
+                conn.execute("RELEASE bulk_upsert")
+                return {}
+            except sqlite3.Error:
+                conn.execute("ROLLBACK TO bulk_upsert")
+                conn.execute("RELEASE bulk_upsert")
+
+            # Something in the batch was rejected: redo it row by row to name the culprits
+            failures = {}
+            for index, row in enumerate(rows):
+                try:
+                    conn.execute(cls.BULK_UPSERT_SQL, row)
+                except sqlite3.Error as e:
+                    failures[index] = str(e)
+            return failures
+
+        failures = cls._write(job, action=f"importing {len(rows)} products", default=None)
+        # Updates by id can touch any cached product
+        catalog_cache.clear()
+        return failures
+
+    @classmethod
+    def iter_product_rows(cls, batch_size=1000):
+        # Every product as a raw row, in id order. Each batch borrows its own pooled
+        # connection and hands it back (not the request's, which a streamed response
+        # would keep until teardown), so a slow consumer never pins the pool.
+        sql = "SELECT * FROM products WHERE id > ? ORDER BY id LIMIT ?"
+        last_id = 0
+        while True:
+            rows = cls._read(lambda conn: conn.execute(sql, (last_id, batch_size)).fetchall(),
+                             action="exporting products", default=[], scoped=False)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]['id']
 
     # =========================================================
     # Read: Fetch All Products (With Sorting Support)
     # =========================================================
-    @staticmethod
-    def get_all_products(ordered_by="created_at", sort_type="DESC"):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-    
-            if ordered_by not in ALLOWED_SORT_COLUMNS: ordered_by = "created_at"
-            if sort_type not in ALLOWED_SORT_TYPES: sort_type = "DESC"
-            
-            
-            sql = f"SELECT * FROM products ORDER BY category ASC, {ordered_by} {sort_type}"
-            
-            cursor.execute(sql)
-            rows = cursor.fetchall()
-            return [ProductRepository._map_row_to_object(row) for row in rows]
-            
-        except Exception as e:
-            print(f" Error fetching products: {e}")
-            return []
-        finally:
-            if conn: conn.close()
+    @classmethod
+    def get_all_products(cls, ordered_by="created_at", sort_type="DESC"):
+        ordered_by, sort_type = cls._normalize_sort(ordered_by, sort_type)
+        sql = f"SELECT * FROM products ORDER BY category ASC, {ordered_by} {sort_type}"
+        return catalog_cache.get(
+            ("list", "all", ordered_by, sort_type),
+            lambda: cls._fetch_all(sql, action="fetching products")
+        )
 
     # =========================================================
     # Read: Fetch Products from a Specific Category (With Sorting Support)
     # =========================================================
+    @classmethod
+    def get_products_by_category(cls, category, ordered_by="created_at", sort_type="DESC"):
+        ordered_by, sort_type = cls._normalize_sort(ordered_by, sort_type)
+        sql = f"SELECT * FROM products WHERE category = ? ORDER BY {ordered_by} {sort_type}"
+        return catalog_cache.get(
+            ("list", "category", category, ordered_by, sort_type),
+            lambda: cls._fetch_all(sql, (category,), action=f"fetching category {category}")
+        )
+
+    # =========================================================
+    # Read: Keyset Pages (cursor = last row's sort value + id)
+    # =========================================================
     @staticmethod
-    def get_products_by_category(category, ordered_by="created_at", sort_type="DESC"):
-        conn = None
+    def _encode_cursor(row, ordered_by):
+        raw = json.dumps([row[ordered_by], row['id']], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        # Opaque to callers; a malformed cursor just restarts at the first page
+        if not cursor:
+            return None
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-        
-            if ordered_by not in ALLOWED_SORT_COLUMNS: ordered_by = "created_at"
-            if sort_type not in ALLOWED_SORT_TYPES: sort_type = "DESC"
-
-    
-            sql = f"SELECT * FROM products WHERE category = ? ORDER BY {ordered_by} {sort_type}"
-            
-            cursor.execute(sql, (category,))
-            rows = cursor.fetchall()
-            return [ProductRepository._map_row_to_object(row) for row in rows]
-        except Exception as e:
-            print(f" Error fetching category {category}: {e}")
-            return []
-        finally:
-            if conn: conn.close()
+            padded = cursor + "=" * (-len(cursor) % 4)
+            value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return value, int(last_id)
+        except (ValueError, TypeError):
+            return None
+
+    @classmethod
+    def _fetch_page(cls, where, params, ordered_by, sort_type, after, limit, action):
+        # One index range scan of limit + 1 rows, however deep the page is
+        ordered_by, sort_type = cls._normalize_sort(ordered_by, sort_type)
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        clauses, params = list(where), list(params)
+
+        position = cls._decode_cursor(after)
+        if position is not None:
+            op = "<" if sort_type == "DESC" else ">"
+            clauses.append(f"({ordered_by}, id) {op} (?, ?)")
+            params.extend(position)
+
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM products {where_sql} ORDER BY {ordered_by} {sort_type}, id {sort_type} LIMIT ?"
+        params.append(limit + 1)
+
+        def load():
+            rows = cls._fetch_all(sql, tuple(params), action=action, raw=True)
+            if not rows:
+                return None
+            next_cursor = cls._encode_cursor(rows[limit - 1], ordered_by) if len(rows) > limit else None
+            return [cls._map_row_to_object(row) for row in rows[:limit]], next_cursor
+
+        key = ("list", "page", tuple(where), tuple(params), ordered_by, sort_type)
+        products, next_cursor = catalog_cache.get(key, load) or ([], None)
+        return list(products), next_cursor
+
+    @classmethod
+    def get_all_products_page(cls, ordered_by="created_at", sort_type="DESC", after=None, limit=DEFAULT_PAGE_SIZE):
+        """Returns (products, next_cursor); pass next_cursor as after= for the next page (None = last page)."""
+        return cls._fetch_page([], [], ordered_by, sort_type, after, limit, action="fetching products page")
+
+    @classmethod
+    def get_products_by_category_page(cls, category, ordered_by="created_at", sort_type="DESC", after=None, limit=DEFAULT_PAGE_SIZE):
+        """Same as get_all_products_page, within one category."""
+        return cls._fetch_page(["category = ?"], [category], ordered_by, sort_type, after, limit,
+                               action=f"fetching category {category} page")
 
     # =========================================================
-    # Search: Search for a Product by Name (New)
+    # Filter: Attribute Facets over details (product_attributes index)
     # =========================================================
     @staticmethod
-    def search_products(query):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-        
-            sql = "SELECT * FROM products WHERE name LIKE ? ORDER BY price ASC"
-            cursor.execute(sql, (f'%{query}%',))
-            rows = cursor.fetchall()
-            return [ProductRepository._map_row_to_object(row) for row in rows]
-        except Exception as e:
-            print(f" Error searching for {query}: {e}")
-            return []
-        finally:
-            if conn: conn.close()
+    def _normalize_attrs(attrs):
+        # {"Brand": "Bosch", "power": ["1500W", "2000W"]} -> (("brand", ("1500W",...)), ...) sorted
+        normalized = {}
+        for name, values in (attrs or {}).items():
+            if isinstance(values, (str, int, float)):
+                values = [values]
+            values = tuple(sorted({str(v).strip() for v in values if str(v).strip()}))
+            if values:
+                normalized[str(name).strip().lower()] = values
+        return tuple(sorted(normalized.items()))
+
+    @staticmethod
+    def _filter_clauses(category, price_range, attrs, skip_attr=None):
+        # WHERE clauses over products; values of one attribute are OR-ed, attributes AND-ed
+        clauses, params = [], []
+        if category:
+            clauses.append("category = ?")
+            params.append(category)
+
+        low, high = price_range or (None, None)
+        if low is not None:
+            clauses.append("price >= ?")
+            params.append(float(low))
+        if high is not None:
+            clauses.append("price <= ?")
+            params.append(float(high))
+
+        for name, values in attrs:
+            if name == skip_attr:
+                continue
+            marks = ", ".join("?" for _ in values)
+            clauses.append(f"id IN (SELECT product_id FROM product_attributes WHERE name = ? AND value IN ({marks}))")
+            params.extend([name, *values])
+        return clauses, params
+
+    @classmethod
+    def get_attribute_facets(cls, category=None, price_range=None, attrs=None):
+        """
+        {attribute: [(value, count), ...]} over the products matching the filters.
+        Counts for an attribute that is itself filtered ignore that filter, so
+        the other values of it stay selectable.
+        """
+        attrs = cls._normalize_attrs(attrs)
+
+        def count(conn, clauses, params, name_clause, name_params):
+            where = " AND ".join(clauses + [name_clause]) if name_clause else " AND ".join(clauses)
+            sql = f"""
+            SELECT a.name, a.value, COUNT(*) AS n
+            FROM product_attributes a
+            JOIN products ON products.id = a.product_id
+            {'WHERE ' + where if where else ''}
+            GROUP BY a.name, a.value
+            ORDER BY a.name, n DESC, a.value
+            """
+            return conn.execute(sql, (*params, *name_params)).fetchall()
+
+        def work(conn):
+            # 1 query for the unfiltered attributes + 1 per filtered attribute
+            clauses, params = cls._filter_clauses(category, price_range, attrs)
+            filtered = [name for name, _ in attrs]
+            name_clause = f"a.name NOT IN ({', '.join('?' for _ in filtered)})" if filtered else None
+            rows = list(count(conn, clauses, params, name_clause, filtered))
+            for name in filtered:
+                clauses, params = cls._filter_clauses(category, price_range, attrs, skip_attr=name)
+                rows.extend(count(conn, clauses, params, "a.name = ?", [name]))
+
+            facets = {}
+            for row in rows:
+                values = facets.setdefault(row['name'], [])
+                if len(values) < FACET_VALUE_LIMIT:
+                    values.append((row['value'], row['n']))
+            return dict(sorted(facets.items()))
+
+        key = ("list", "facets", category, tuple(price_range or ()), attrs)
+        return catalog_cache.get(key, lambda: cls._read(work, action="fetching attribute facets", default={})) or {}
+
+    @classmethod
+    def filter_products(cls, category=None, price_range=None, attrs=None, ordered_by="created_at", sort_type="DESC",
+                        after=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        Products matching category, price_range=(min, max) (either end may be None) and
+        attrs={name: value or [values]}. Returns FilterResult(products, facets, next_cursor).
+        """
+        normalized = cls._normalize_attrs(attrs)
+        clauses, params = cls._filter_clauses(category, price_range, normalized)
+        products, next_cursor = cls._fetch_page(clauses, params, ordered_by, sort_type, after, limit,
+                                                action="filtering products")
+        facets = cls.get_attribute_facets(category, price_range, attrs)
+        return FilterResult(products, facets, next_cursor)
 
     # =========================================================
-    # Read: Fetch a Single Product by ID
+    # Search: Full-Text Search (FTS5, ranked by bm25)
     # =========================================================
     @staticmethod
-    def get_product_by_id(product_id):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            sql = "SELECT * FROM products WHERE id = ?"
-            cursor.execute(sql, (product_id,))
-            row = cursor.fetchone()
-            return ProductRepository._map_row_to_object(row)
-        except Exception as e:
-            print(f" Error fetching product {product_id}: {e}")
-            return
+    def _fts_query(text):
+        # User text -> FTS5 query: every word must match, each as a prefix ("dri" finds "drill").
+        # Words are quoted, so operators / punctuation in the input are never parsed.
+        words = re.findall(r"\w+", text or "")
+        return " ".join(f'"{word}"*' for word in words[:10])
+
+    @staticmethod
+    def _highlight_html(text):
+        if not text:
+            return Markup("")
+        html = str(escape(text))
+        return Markup(html.replace(HIGHLIGHT_OPEN, "<mark>").replace(HIGHLIGHT_CLOSE, "</mark>"))
+
+    @classmethod
+    def search_catalog(cls, query, after=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        Searches name, category and details values. Returns (hits, next_cursor)
+        with the best matches first; pass next_cursor as after= for more.
+        """
+        match = cls._fts_query(query)
+        if not match:
+            return [], None
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+        score = f"bm25(products_fts, {', '.join(str(w) for w in SEARCH_WEIGHTS)})"
+        clauses, params = ["products_fts MATCH ?"], [match]
+        position = cls._decode_cursor(after)
+        if position is not None:
+            clauses.append(f"({score}, p.id) > (?, ?)")
+            params.extend(position)
+        params.append(limit + 1)
+
+        sql = f"""
+        SELECT p.*, {score} AS score,
+               highlight(products_fts, 0, char(2), char(3)) AS name_marked,
+               snippet(products_fts, 2, char(2), char(3), '…', 10) AS details_marked
+        FROM products_fts
+        JOIN products p ON p.id = products_fts.rowid
+        WHERE {' AND '.join(clauses)}
+        ORDER BY score, p.id
+        LIMIT ?
+        """
 
+        def work(conn):
+            try:
+                rows = conn.execute(sql, tuple(params)).fetchall()
+            except sqlite3.OperationalError as e:
+                # No FTS index (old database / SQLite without FTS5): plain LIKE, first page only
+                print(f"⚠️ Full-text search unavailable ({e}), falling back to LIKE.")
+                if position is not None:
+                    return [], None
+                rows = conn.execute(
+                    "SELECT *, 0 AS score, name AS name_marked, '' AS details_marked FROM products "
+                    "WHERE name LIKE ? OR category LIKE ? ORDER BY price ASC LIMIT ?",
+                    (f'%{query}%', f'%{query}%', limit)
+                ).fetchall()
+
+            next_cursor = cls._encode_cursor(rows[limit - 1], 'score') if len(rows) > limit else None
+            hits = [
+                SearchHit(
+                    product=cls._map_row_to_object(row),
+                    name_html=cls._highlight_html(row['name_marked']),
+                    snippet_html=cls._highlight_html(row['details_marked']) if HIGHLIGHT_OPEN in (row['details_marked'] or '') else None,
+                    score=row['score']
+                )
+                for row in rows[:limit]
+            ]
+            return hits, next_cursor
+
+        return cls._read(work, action=f"searching for {query}", default=([], None))
+
+    @classmethod
+    def search_products(cls, query):
+        # Kept for existing callers: best matches first, as Product objects
+        hits, _ = cls.search_catalog(query, limit=MAX_PAGE_SIZE)
+        return [hit.product for hit in hits]
+
+    # =========================================================
+    # Read: Fetch a Single Product by ID
+    # =========================================================
+    @classmethod
+    def get_product_by_id(cls, product_id):
+        sql = "SELECT * FROM products WHERE id = ?"
+        return catalog_cache.get(
+            ("product", product_id),
+            lambda: cls._fetch_one(sql, (product_id,), action=f"fetching product {product_id}")
+        )
+
+    @classmethod
+    def get_products_by_ids(cls, product_ids):
+        """
+        {id: Product} for any number of ids: cached products are served from the
+        catalog cache, the rest in one IN (...) query per ID_CHUNK_SIZE ids.
+        Ids that do not exist are left out.
+        """
+        ids = [product_id for product_id in dict.fromkeys(product_ids) if product_id is not None]
+        if not ids:
+            return {}
+
+        def load(keys):
+            def work(conn):
+                found = {}
+                for chunk, marks in cls._id_chunks(key[1] for key in keys):
+                    for row in conn.execute(f"SELECT * FROM products WHERE id IN ({marks})", chunk):
+                        found[("product", row['id'])] = cls._map_row_to_object(row)
+                return found
+            return cls._read(work, action=f"fetching {len(keys)} products", default={})
+
+        found = catalog_cache.get_many([("product", product_id) for product_id in ids], load)
+        return {key[1]: product for key, product in found.items() if product}
 
     # =========================================================
     # Update: Edit Product Details (With Protection Against Negative Values )
     # =========================================================
-    @staticmethod
-    def update_product(product_id, name=None, price=None, image_url=None, category=None, stock_quantity=None, details_dict=None):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-
-            fields_to_update = []
-            values = []
-
-            if name is not None:
-                fields_to_update.append("name = ?")
-                values.append(name)
-            
-        
-            if price is not None:
-                if float(price) < 0:
-                    print(" Update Rejected: Price cannot be negative.")
-                    return False
-                fields_to_update.append("price = ?")
-                values.append(price)
-            
-            if image_url is not None:
-                fields_to_update.append("image_url = ?")
-                values.append(image_url)
-
-            if category is not None:
-                fields_to_update.append("category = ?")
-                values.append(category)
-
-            
-            if stock_quantity is not None:
-                if int(stock_quantity) < 0:
-                    print(" Update Rejected: Stock cannot be negative.")
-                    return False
-                fields_to_update.append("stock_quantity = ?")
-                values.append(stock_quantity)
-
-            
-            if details_dict is not None:
-                details_json = json.dumps(details_dict)
-                fields_to_update.append("details = ?")
-                values.append(details_json)
-
-            if not fields_to_update:
-                return False 
-
-            sql = f"UPDATE products SET {', '.join(fields_to_update)} WHERE id = ?"
-            values.append(product_id)
-
-            cursor.execute(sql, tuple(values))
-            conn.commit()
-            print(f" Product {product_id} updated successfully.")
-            return True
+    @classmethod
+    def update_product(cls, product_id, name=None, price=None, image_url=None, category=None, stock_quantity=None, details_dict=None):
+        fields_to_update = []
+        values = []
+
+        if name is not None:
+            fields_to_update.append("name = ?")
+            values.append(name)
+
+        if price is not None:
+            if float(price) < 0:
+                print(" Update Rejected: Price cannot be negative.")
+                return False
+            fields_to_update.append("price = ?")
+            values.append(price)
+
+        if image_url is not None:
+            fields_to_update.append("image_url = ?")
+            values.append(image_url)
+
+        if category is not None:
+            fields_to_update.append("category = ?")
+            values.append(category)
+
+        if stock_quantity is not None:
+            if int(stock_quantity) < 0:
+                print(" Update Rejected: Stock cannot be negative.")
+                return False
+            fields_to_update.append("stock_quantity = ?")
+            values.append(stock_quantity)
 
-        except Exception as e:
-            print(f" Error updating product {product_id}: {e}")
+        if details_dict is not None:
+            details_json = json.dumps(details_dict)
+            fields_to_update.append("details = ?")
+            values.append(details_json)
+
+        if not fields_to_update:
+            return False
+
+        sql = f"UPDATE products SET {', '.join(fields_to_update)} WHERE id = ?"
+        values.append(product_id)
+
+        if cls._execute(sql, tuple(values), action=f"updating product {product_id}") is False:
             return False
-        finally:
-            if conn: conn.close()
+        catalog_cache.invalidate(product_id)
+        print(f" Product {product_id} updated successfully.")
+        return True
 
     # =========================================================
     # Update: Reduce Stock (Thread-Safe Transaction)
     # =========================================================
-    @staticmethod
-    def reduce_stock(product_id, quantity, cursor=None):
-        conn = None
-        try:
-            # If no cursor provided, open a new connection (isolated transaction)
-            if cursor is None:
-                conn = get_connection()
-                cursor = conn.cursor()
-            
-            # Perform update
-            sql = """
-                   UPDATE products
-                   SET stock_quantity = stock_quantity - ?
-                   WHERE id = ? AND stock_quantity >= ?
-                """
-            cursor.execute(sql, (quantity, product_id, quantity))
-            
-            # If we own the connection, commit and close
-            if conn:
-                conn.commit()
-                return cursor.rowcount > 0
-            
-            # If external cursor, just return success (caller commits)
-            return True
-            
-        except Exception as e:
-            print(f" Error reducing stock: {e}")
-            return False
-        finally:
-            if conn: conn.close()
+    @classmethod
+    def reduce_stock(cls, product_id, quantity, cursor=None):
+        sql = """
+               UPDATE products
+               SET stock_quantity = stock_quantity - ?
+               WHERE id = ? AND stock_quantity >= ?
+            """
+        params = (quantity, product_id, quantity)
+
+        # External cursor: part of the caller's transaction (caller commits or rolls back on False).
+        # The caller also drops the cached product, after the commit: invalidating
+        # here would let a concurrent read cache the old stock again before it.
+        if cursor is not None:
+            cursor.execute(sql, params)
+            return cursor.rowcount > 0
+
+        reduced = cls._execute(sql, params, action="reducing stock") > 0
+        catalog_cache.invalidate(product_id)
+        return reduced
 
     # =========================================================
     # Delete: Remove Product
     # =========================================================
-    @staticmethod
-    def delete_product(product_id):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            sql = "DELETE FROM products WHERE id = ?"
-            cursor.execute(sql, (product_id,))
-            conn.commit()
-            
-            if cursor.rowcount > 0:
-                print(f" Product {product_id} deleted.")
-                return True
-            else:
-                print(f" Product {product_id} not found.")
-                return False
-                
-        except Exception as e:
-            print(f" Error deleting product: {e}")
+    @classmethod
+    def delete_product(cls, product_id):
+        deleted = cls._execute("DELETE FROM products WHERE id = ?", (product_id,), action="deleting product")
+        if deleted is False:
             return False
-        finally:
-            if conn: conn.close()
+        catalog_cache.invalidate(product_id)
 
-    @staticmethod
-    def get_all_categories():
-        conn = get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT category FROM products WHERE category IS NOT NULL AND category != ''")
-            rows = cursor.fetchall()
-            return [row['category'] for row in rows]
-        except Exception as e:
-            print(f"Error fetching categories: {e}")
-            return []
-        finally:
-            conn.close()
\ No newline at end of file
+        if deleted > 0:
+            print(f" Product {product_id} deleted.")
+            return True
+        print(f" Product {product_id} not found.")
+        return False
+
+    @classmethod
+    def get_category_summaries(cls):
+        """CategorySummary per category (product / in-stock counts, price range), sorted by name."""
+        sql = "SELECT name, product_count, in_stock_count, min_price, max_price FROM categories ORDER BY name"
+        def load():
+            return cls._fetch_all(sql, action="fetching category summaries", mapper=lambda row: CategorySummary(*row))
+        return catalog_cache.get(("list", "categories"), load)
+
+    @classmethod
+    def get_category_summary(cls, category):
+        return next((c for c in cls.get_category_summaries() if c.name == category), None)
+
+    @classmethod
+    def get_all_categories(cls):
+        # Category names, sorted
+        return [c.name for c in cls.get_category_summaries()]
+
+    # =========================================================
+    # Async variants (for async views)
+    # =========================================================
+    @classmethod
+    async def aget_product_by_id(cls, product_id):
+        return await cls._async(cls.get_product_by_id, product_id)
+
+    @classmethod
+    async def aget_products_by_ids(cls, product_ids):
+        return await cls._async(cls.get_products_by_ids, list(product_ids))
+
+    @classmethod
+    async def aget_all_products(cls, ordered_by="created_at", sort_type="DESC"):
+        return await cls._async(cls.get_all_products, ordered_by, sort_type)
+
+    @classmethod
+    async def aget_products_by_category(cls, category, ordered_by="created_at", sort_type="DESC"):
+        return await cls._async(cls.get_products_by_category, category, ordered_by, sort_type)
+
+    @classmethod
+    async def asearch_products(cls, query):
+        return await cls._async(cls.search_products, query)
+
+    @classmethod
+    async def aget_all_categories(cls):
+        return await cls._async(cls.get_all_categories)
+
+    @classmethod
+    async def aget_category_summaries(cls):
+        return await cls._async(cls.get_category_summaries)
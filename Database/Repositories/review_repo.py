@@ -1,14 +1,13 @@
-import sqlite3
-from Database.db_manager import get_connection
+from Database.Repositories.base_repo import BaseRepository
 from models.review_model import Review
 
-class ReviewRepository:
+class ReviewRepository(BaseRepository):
 
-    @staticmethod
-    def _map_row_to_object(row):
+    @classmethod
+    def _map_row_to_object(cls, row):
         if not row:
             return None
-        
+
         return Review(
             review_id=row["id"],
             user_id=row["user_id"],
@@ -22,94 +21,70 @@ class ReviewRepository:
     # =========================
     # Add Review
     # =========================
-    @staticmethod
-    def add_review(review: Review):
-        conn = None
-        try:
-            if not (1 <= review.rating <= 5):
-                print("⚠️ Rating must be between 1 and 5.")
-                return False
-
-            conn = get_connection()
-            cursor = conn.cursor()
-
-            sql = """
-            INSERT INTO reviews (user_id, product_id, rating, comment)
-            VALUES (?, ?, ?, ?)
-            """
-
-            cursor.execute(sql, (
-                review.user_id,
-                review.product_id,
-                review.rating,
-                review.comment
-            ))
+    @classmethod
+    def add_review(cls, review: Review):
+        if not (1 <= review.rating <= 5):
+            print("⚠️ Rating must be between 1 and 5.")
+            return False
 
-            conn.commit()
-            print(f"✅ Review added for product {review.product_id}.")
-            return True
+        sql = """
+        INSERT INTO reviews (user_id, product_id, rating, comment)
+        VALUES (?, ?, ?, ?)
+        """
+        params = (
+            review.user_id,
+            review.product_id,
+            review.rating,
+            review.comment
+        )
 
-        except Exception as e:
-            print(f"❌ Error adding review: {e}")
+        if cls._execute(sql, params, action="adding review") is False:
             return False
-        finally:
-            if conn:
-                conn.close()
+        print(f"✅ Review added for product {review.product_id}.")
+        return True
 
     # =========================
     # Get Reviews For Product
     # =========================
-    @staticmethod
-    def get_reviews_by_product(product_id):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-
-            sql = """
-            SELECT r.*, u.username
-            FROM reviews r
-            JOIN users u ON r.user_id = u.id
-            WHERE r.product_id = ?
-            ORDER BY r.created_at DESC
-            """
-
-            cursor.execute(sql, (product_id,))
-            rows = cursor.fetchall()
-
-            return [ReviewRepository._map_row_to_object(row) for row in rows]
-
-        except Exception as e:
-            print(f"❌ Error fetching reviews: {e}")
-            return []
-        finally:
-            if conn:
-                conn.close()
+    @classmethod
+    def get_reviews_by_product(cls, product_id):
+        sql = """
+        SELECT r.*, u.username
+        FROM reviews r
+        JOIN users u ON r.user_id = u.id
+        WHERE r.product_id = ?
+        ORDER BY r.created_at DESC
+        """
+        return cls._fetch_all(sql, (product_id,), action="fetching reviews")
+
+    @classmethod
+    def get_review_version(cls, product_id):
+        """
+        (count, last id, last created_at) of a product's reviews: changes whenever
+        one is added or deleted (ids are AUTOINCREMENT, never reused).
+        """
+        sql = "SELECT COUNT(*), MAX(id), MAX(created_at) FROM reviews WHERE product_id = ?"
+        row = cls._fetch_one(sql, (product_id,), action="fetching review version", raw=True)
+        return tuple(row) if row else None
 
     # =========================
     # Delete Review
     # =========================
-    @staticmethod
-    def delete_review(review_id):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-
-            sql = "DELETE FROM reviews WHERE id = ?"
-            cursor.execute(sql, (review_id,))
-            conn.commit()
+    @classmethod
+    def delete_review(cls, review_id):
+        deleted = cls._execute("DELETE FROM reviews WHERE id = ?", (review_id,), action="deleting review")
+        if deleted is False:
+            return False
 
-            if cursor.rowcount > 0:
-                print(f"🗑️ Review {review_id} deleted successfully.")
-                return True
-            else:
-                print("⚠️ Review not found.")
-                return False
+        if deleted > 0:
+            print(f"🗑️ Review {review_id} deleted successfully.")
+            return True
+        print("⚠️ Review not found.")
+        return False
 
-        except Exception as e:
-            print(f"❌ Error deleting review: {e}")
-            return False
-        finally:
-            if conn:
-                conn.close()
+    # =========================
+    # Async variants (for async views)
+    # =========================
+    @classmethod
+    async def aget_reviews_by_product(cls, product_id):
+        return await cls._async(cls.get_reviews_by_product, product_id)
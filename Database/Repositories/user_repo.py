@@ -1,16 +1,15 @@
-import sqlite3
 import json
 from werkzeug.security import generate_password_hash
-from Database.db_manager import get_connection
+from Database.Repositories.base_repo import BaseRepository
 from models.user_model import User, Customer, Admin
 
-class UserRepository:
-    
-    @staticmethod
-    def _map_row_to_object(row):
+class UserRepository(BaseRepository):
+
+    @classmethod
+    def _map_row_to_object(cls, row):
         if not row:
             return None
-        
+
         u_id = row['id']
         name = row['username']
         email = row['email']
@@ -28,209 +27,127 @@ class UserRepository:
             return User(u_id, name, email, pw, role, mob)
 
 
-    @staticmethod
-    def add_user(user_object):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            info_dict = {}
-            
-            if isinstance(user_object, Customer):
-                info_dict = {
-                    'address': user_object.address,
-                    'loyalty_points': getattr(user_object, 'loyalty_points', 0)
-                }
-            elif isinstance(user_object, Admin):
-                info_dict = {
-                    'department': user_object.department
-                }
-            
-            info_json = json.dumps(info_dict)
-
-            sql = """
-            INSERT INTO users (username, email, password_hash, role, mobile, specific_info)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """
-            
-            cursor.execute(sql, (
-                user_object.username,
-                user_object.email,
-                user_object.get_password_hash(), 
-                user_object.role,
-                user_object.mobile,
-                info_json
-            ))
-            
-            conn.commit()
-            print(f"✅ User '{user_object.username}' added successfully.")
-            return True
-            
-        except sqlite3.IntegrityError:
-            print(f"⚠️ Error: User '{user_object.username}' or Email already exists.")
-            return False
-        except Exception as e:
-            print(f"❌ Error adding user: {e}")
+    @classmethod
+    def add_user(cls, user_object):
+        info_dict = {}
+
+        if isinstance(user_object, Customer):
+            info_dict = {
+                'address': user_object.address,
+                'loyalty_points': getattr(user_object, 'loyalty_points', 0)
+            }
+        elif isinstance(user_object, Admin):
+            info_dict = {
+                'department': user_object.department
+            }
+
+        info_json = json.dumps(info_dict)
+
+        sql = """
+        INSERT INTO users (username, email, password_hash, role, mobile, specific_info)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """
+        params = (
+            user_object.username,
+            user_object.email,
+            user_object.get_password_hash(),
+            user_object.role,
+            user_object.mobile,
+            info_json
+        )
+
+        added = cls._execute(
+            sql, params, action="adding user",
+            integrity_message=f"Error: User '{user_object.username}' or Email already exists."
+        )
+        if added is False:
             return False
-        finally:
-            if conn:
-                conn.close()
-
-
-    @staticmethod
-    def get_user_by_email(email):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            sql = "SELECT * FROM users WHERE email = ?"
-            cursor.execute(sql, (email,))
-            user = cursor.fetchone()
-            return UserRepository._map_row_to_object(user)
-        except Exception as e:
-            print(f"❌ Error fetching user: {e}")
-            return None
-        finally:
-            if conn:
-                conn.close()
-
-    @staticmethod
-    def get_user_by_username(username):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            sql = "SELECT * FROM users WHERE username = ?"
-            cursor.execute(sql, (username,))
-            user = cursor.fetchone()
-            return UserRepository._map_row_to_object(user)
-        except Exception as e:
-            print(f"❌ Error fetching user: {e}")
-            return None
-        finally:
-            if conn:
-                conn.close()
-
-    @staticmethod
-    def get_user_by_id(user_id):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            sql = "SELECT * FROM users WHERE id = ?"
-            cursor.execute(sql, (user_id,))
-            user = cursor.fetchone()
-            return UserRepository._map_row_to_object(user)
-        except Exception as e:
-            print(f"❌ Error fetching user: {e}")
-            return None
-        finally:
-            if conn:
-                conn.close()
+        print(f"✅ User '{user_object.username}' added successfully.")
+        return True
 
 
-    @staticmethod
-    def update_user(user_id, username=None, email=None, password=None, mobile=None, specific_info=None):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
+    @classmethod
+    def get_user_by_email(cls, email):
+        sql = "SELECT * FROM users WHERE email = ?"
+        return cls._fetch_one(sql, (email,), action="fetching user")
 
-            fields_to_update = []
-            values = []
+    @classmethod
+    def get_user_by_username(cls, username):
+        sql = "SELECT * FROM users WHERE username = ?"
+        return cls._fetch_one(sql, (username,), action="fetching user")
 
-            if username is not None:
-                fields_to_update.append("username = ?")
-                values.append(username)
+    @classmethod
+    def get_user_by_id(cls, user_id):
+        sql = "SELECT * FROM users WHERE id = ?"
+        return cls._fetch_one(sql, (user_id,), action="fetching user")
 
-            if email is not None:
-                fields_to_update.append("email = ?")
-                values.append(email)
 
-            if password is not None:
-                hashed_pw = generate_password_hash(password)
-                fields_to_update.append("password_hash = ?")
-                values.append(hashed_pw)
+    @classmethod
+    def update_user(cls, user_id, username=None, email=None, password=None, mobile=None, specific_info=None):
+        fields_to_update = []
+        values = []
 
-            if mobile is not None:
-                fields_to_update.append("mobile = ?")
-                values.append(mobile)
+        if username is not None:
+            fields_to_update.append("username = ?")
+            values.append(username)
 
-            if specific_info is not None:
-                info_json = json.dumps(specific_info)
-                fields_to_update.append("specific_info = ?")
-                values.append(info_json)
+        if email is not None:
+            fields_to_update.append("email = ?")
+            values.append(email)
 
-            if not fields_to_update:
-                return False
+        if password is not None:
+            hashed_pw = generate_password_hash(password)
+            fields_to_update.append("password_hash = ?")
+            values.append(hashed_pw)
 
-            sql = f"UPDATE users SET {', '.join(fields_to_update)} WHERE id = ?"
-            values.append(user_id)
+        if mobile is not None:
+            fields_to_update.append("mobile = ?")
+            values.append(mobile)
 
-            cursor.execute(sql, tuple(values))
-            conn.commit()
-            print(f"✅ User {user_id} updated successfully.")
-            return True
+        if specific_info is not None:
+            info_json = json.dumps(specific_info)
+            fields_to_update.append("specific_info = ?")
+            values.append(info_json)
 
-        except sqlite3.IntegrityError:
-            print(f"⚠️ Error: Username or Email already exists.")
+        if not fields_to_update:
             return False
-        except Exception as e:
-            print(f"❌ Error updating user {user_id}: {e}")
+
+        sql = f"UPDATE users SET {', '.join(fields_to_update)} WHERE id = ?"
+        values.append(user_id)
+
+        updated = cls._execute(
+            sql, tuple(values), action=f"updating user {user_id}",
+            integrity_message="Error: Username or Email already exists."
+        )
+        if updated is False:
             return False
-        finally:
-            if conn:
-                conn.close()
-    
-    @staticmethod
-    def delete_user(user_id):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            sql = "DELETE FROM users WHERE id = ?"
-            cursor.execute(sql, (user_id,))
-            conn.commit()
-            
-            if cursor.rowcount > 0:
-                print(f"🗑️ User {user_id} deleted successfully.")
-                return True
-            else:
-                print(f"⚠️ User {user_id} not found.")
-                return False
-                
-        except Exception as e:
-            print(f"❌ Error deleting user {user_id}: {e}")
+        print(f"✅ User {user_id} updated successfully.")
+        return True
+
+    @classmethod
+    def delete_user(cls, user_id):
+        deleted = cls._execute("DELETE FROM users WHERE id = ?", (user_id,), action=f"deleting user {user_id}")
+        if deleted is False:
             return False
-        finally:
-            if conn:
-                conn.close()
+
+        if deleted > 0:
+            print(f"🗑️ User {user_id} deleted successfully.")
+            return True
+        print(f"⚠️ User {user_id} not found.")
+        return False
 
     # =========================
     # Get All Users (For Admin)
     # =========================
-    @staticmethod
-    def get_all_users():
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            sql = "SELECT * FROM users ORDER BY created_at DESC"
-            cursor.execute(sql)
-            rows = cursor.fetchall()
-            
-            # تحويل كل صف لـ Object باستخدام دالة المابينج اللي عندك
-            return [UserRepository._map_row_to_object(row) for row in rows]
-            
-        except Exception as e:
-            print(f"❌ Error fetching users: {e}")
-            return []
-        finally:
-            if conn:
-                conn.close()
\ No newline at end of file
+    @classmethod
+    def get_all_users(cls):
+        sql = "SELECT * FROM users ORDER BY created_at DESC"
+        # تحويل كل صف لـ Object باستخدام دالة المابينج اللي عندك
+        return cls._fetch_all(sql, action="fetching users")
+
+    # =========================
+    # Async variants (for async views)
+    # =========================
+    @classmethod
+    async def aget_user_by_id(cls, user_id):
+        return await cls._async(cls.get_user_by_id, user_id)
@@ -1,15 +1,19 @@
-import sqlite3
-from Database.db_manager import get_connection
+from Database.Repositories.base_repo import BaseRepository
 from Database.Repositories.product_repo import ProductRepository
 from models.wishlist import Wishlist, WishlistItem
 
-class WishlistRepository:
-    @staticmethod
-    def _map_row_to_object(row, user_object):
+class WishlistRepository(BaseRepository):
+    @classmethod
+    def _map_wishlist_row(cls, row, user_object, products):
+        # Not the single-row _map_row_to_object hook: a wishlist row needs its user
+        # and the {id: Product} map prefetched for the whole wishlist with
+        # get_products_by_ids (required: a lookup per row would be the N+1 query again)
+        if products is None:
+            raise ValueError("Wishlist rows need their products prefetched.")
         if not row:
-            return None      
-        product = ProductRepository.get_product_by_id(row['product_id'])
-        
+            return None
+        product = products.get(row['product_id'])
+
         if product:
             return WishlistItem(
                 item_id=row['id'],
@@ -18,75 +22,42 @@ class WishlistRepository:
             )
         return None
 
-    @staticmethod
-    def get_wishlist_by_user(user_object):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            sql = "SELECT * FROM wishlist_items WHERE user_id = ?"
-            cursor.execute(sql, (user_object.id,))
-            rows = cursor.fetchall()
-            
-            wishlist = Wishlist(user_object)
-            for row in rows:
-                item = WishlistRepository._map_row_to_object(row, user_object)
-                if item:
-                    wishlist._items.append(item)     
-            return wishlist
-
-        except Exception as e:
-            print(f"❌ Error fetching wishlist: {e}")
+    @classmethod
+    def get_wishlist_by_user(cls, user_object):
+        sql = "SELECT * FROM wishlist_items WHERE user_id = ?"
+        rows = cls._read(lambda conn: conn.execute(sql, (user_object.id,)).fetchall(),
+                         action="fetching wishlist", default=None)
+        if rows is None:
             return None
-        finally:
-            if conn: conn.close()
 
-    @staticmethod
-    def add_item(user_id, product_id):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            sql = "INSERT INTO wishlist_items (user_id, product_id) VALUES (?, ?)"
-            cursor.execute(sql, (user_id, product_id))
-            conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            return False
-        except Exception as e:
-            print(f"❌ Error adding item to wishlist: {e}")
-            return False
-        finally:
-            if conn: conn.close()
+        # One products query for the whole wishlist
+        products = ProductRepository.get_products_by_ids(row['product_id'] for row in rows)
+        wishlist = Wishlist(user_object)
+        for row in rows:
+            item = cls._map_wishlist_row(row, user_object, products)
+            if item:
+                wishlist._add_item(item)
+        return wishlist
+
+    @classmethod
+    def add_item(cls, user_id, product_id):
+        # Already in the wishlist -> nothing inserted, just False
+        sql = "INSERT OR IGNORE INTO wishlist_items (user_id, product_id) VALUES (?, ?)"
+        return cls._execute(sql, (user_id, product_id), action="adding item to wishlist") > 0
+
+    @classmethod
+    def remove_item(cls, user_id, product_id):
+        sql = "DELETE FROM wishlist_items WHERE user_id = ? AND product_id = ?"
+        return cls._execute(sql, (user_id, product_id), action="removing item from wishlist") > 0
 
-    @staticmethod
-    def remove_item(user_id, product_id):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            sql = "DELETE FROM wishlist_items WHERE user_id = ? AND product_id = ?"
-            cursor.execute(sql, (user_id, product_id))
-            conn.commit()
-            return cursor.rowcount > 0
-        except Exception as e:
-            print(f"❌ Error removing item from wishlist: {e}")
-            return False
-        finally:
-            if conn: conn.close()
+    @classmethod
+    def clear_wishlist(cls, user_id):
+        sql = "DELETE FROM wishlist_items WHERE user_id = ?"
+        return cls._execute(sql, (user_id,), action="clearing wishlist") is not False
 
-    @staticmethod
-    def clear_wishlist(user_id):
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            sql = "DELETE FROM wishlist_items WHERE user_id = ?"
-            cursor.execute(sql, (user_id,))
-            conn.commit()
-            return True
-        except Exception as e:
-            print(f"❌ Error clearing wishlist: {e}")
-            return False
-        finally:
-            if conn: conn.close()
\ No newline at end of file
+    # =========================
+    # Async variants (for async views)
+    # =========================
+    @classmethod
+    async def aget_wishlist_by_user(cls, user_object):
+        return await cls._async(cls.get_wishlist_by_user, user_object)
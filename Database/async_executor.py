@@ -0,0 +1,81 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads available to `await`-able repository calls (per process)
+ASYNC_WORKERS = int(os.environ.get("TRADEENGINE_ASYNC_WORKERS", 4))
+
+
+# ============================================
+# Async Executor
+# ============================================
+class AsyncExecutor:
+    """
+    Bounded thread pool that runs blocking repository calls for async views.
+
+    sqlite3 has no async driver, so an awaitable repository call is the
+    blocking call executed on one of these threads while the event loop
+    carries on with other work (payment calls, other queries, rendering).
+    Each task runs inside task_scope(), which lets db_manager hand the
+    thread its own connections and take them back when the task ends.
+    The caller's contextvars (Flask app/request context) are copied into
+    the task so current_app and the SQL profiler keep working.
+    """
+
+    def __init__(self, task_scope, max_workers=ASYNC_WORKERS):
+        self.task_scope = task_scope
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # Threads do not survive fork(): the child starts a fresh executor on first use.
+        self._executor = None
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "active": 0}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="tradeengine-async"
+                )
+            return self._executor
+
+    def _call(self, context, func, args, kwargs):
+        with self._lock:
+            self._stats["active"] += 1
+        ok = False
+        try:
+            with self.task_scope():
+                result = context.run(func, *args, **kwargs)
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self._stats["active"] -= 1
+                self._stats["completed" if ok else "failed"] += 1
+
+    def run(self, func, *args, **kwargs):
+        # Schedules func(*args, **kwargs) and returns an awaitable for its result.
+        executor = self._get_executor()
+        with self._lock:
+            self._stats["submitted"] += 1
+        future = executor.submit(self._call, contextvars.copy_context(), func, args, kwargs)
+        return asyncio.wrap_future(future)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["max_workers"] = self.max_workers
+        stats["started"] = self._executor is not None
+        return stats
@@ -0,0 +1,211 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from Database.db_manager import get_read_connection, reads_from_snapshot
+
+# Cached catalog entries per process (single products + product lists)
+CATALOG_CACHE_SIZE = int(os.environ.get("TRADEENGINE_CATALOG_CACHE_SIZE", 1024))
+# Seconds between polls of catalog_changes (how stale other workers' writes can be)
+CATALOG_SYNC_INTERVAL = float(os.environ.get("TRADEENGINE_CATALOG_SYNC_INTERVAL", 1.0))
+CATALOG_CACHE_ENABLED = os.environ.get("TRADEENGINE_CATALOG_CACHE", "1") == "1"
+# More pending changes than this and a full flush is cheaper than evicting one by one
+MAX_CHANGES_PER_SYNC = 500
+
+
+# ============================================
+# Catalog Cache
+# ============================================
+class CatalogCache:
+    """
+    Per-process LRU cache in front of ProductRepository's catalog reads.
+
+    Keys are ("product", id) for single products and ("list", ...) for
+    product lists and categories. Writes made through ProductRepository
+    invalidate locally at once (write-through). Every other write, from
+    another worker or raw SQL, is picked up from the trigger-maintained
+    catalog_changes log. That log is polled at most once per sync interval
+    and names the product behind each new catalog version. Changing one
+    product evicts that product plus every cached list.
+
+    Results loaded while an invalidation raced the load are not stored,
+    so a cache entry is never older than the last invalidation it saw.
+    """
+
+    def __init__(self, max_entries=CATALOG_CACHE_SIZE, sync_interval=CATALOG_SYNC_INTERVAL, enabled=CATALOG_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.sync_interval = sync_interval
+        self.enabled = enabled
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # Children start cold: cheaper than trusting entries copied mid-update.
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self._epoch = 0
+        self._next_sync = 0.0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "syncs": 0,
+            "full_flushes": 0,
+        }
+
+    # =========================
+    # Lookups
+    # =========================
+    def get(self, key, loader):
+        # Returns the cached value for key, or loader()'s result (cached when truthy;
+        # repositories return None / [] on errors, which must not stick).
+        if not self.enabled:
+            return loader()
+        self.sync()
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._copy(self._entries[key])
+            self.stats["misses"] += 1
+            epoch = self._epoch
+
+        value = loader()
+        # Snapshot reads may be older than the cache: serve them, never store them
+        if not value or reads_from_snapshot():
+            return value
+
+        with self._lock:
+            if epoch == self._epoch:
+                self._store(key, value)
+        return self._copy(value)
+
+    def get_many(self, keys, loader):
+        # {key: value} for keys; loader(missing_keys) returns {key: value} for all
+        # the misses at once. Stored under the same rules as get().
+        keys = list(dict.fromkeys(keys))
+        if not self.enabled:
+            return loader(keys) or {}
+        self.sync()
+
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    found[key] = self._copy(self._entries[key])
+                else:
+                    self.stats["misses"] += 1
+                    missing.append(key)
+            epoch = self._epoch
+        if not missing:
+            return found
+
+        loaded = loader(missing) or {}
+        if not reads_from_snapshot():
+            with self._lock:
+                if epoch == self._epoch:
+                    for key, value in loaded.items():
+                        if value:
+                            self._store(key, value)
+        found.update((key, self._copy(value)) for key, value in loaded.items())
+        return found
+
+    def _store(self, key, value):
+        # Caller holds the lock
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    @staticmethod
+    def _copy(value):
+        # Callers may sort/extend lists they get back; cached products are shared
+        return list(value) if isinstance(value, list) else value
+
+    # =========================
+    # Invalidation
+    # =========================
+    def invalidate(self, product_id=None):
+        # A product changed (or was added when product_id is None): drop it and every list.
+        with self._lock:
+            self._evict([product_id])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+            self.stats["full_flushes"] += 1
+
+    def _evict(self, product_ids):
+        self._epoch += 1
+        self.stats["invalidations"] += 1
+        for product_id in product_ids:
+            if product_id is not None:
+                self._entries.pop(("product", product_id), None)
+        for key in [k for k in self._entries if k[0] == "list"]:
+            del self._entries[key]
+
+    def sync(self, force=False):
+        # Applies catalog changes made elsewhere since the last sync.
+        now = time.monotonic()
+        if not force and now < self._next_sync:
+            return
+        self._next_sync = now + self.sync_interval
+
+        conn = get_read_connection(allow_snapshot=False)
+        try:
+            if self._version is None:
+                row = conn.execute("SELECT COALESCE(MAX(version), 0) FROM catalog_changes").fetchone()
+                with self._lock:
+                    if self._version is None:
+                        self._version = row[0]
+                return
+
+            rows = conn.execute(
+                "SELECT version, product_id FROM catalog_changes WHERE version > ? ORDER BY version LIMIT ?",
+                (self._version, MAX_CHANGES_PER_SYNC)
+            ).fetchall()
+            # Too far behind (or the log was pruned past us): start over from the latest version
+            behind = rows and (len(rows) >= MAX_CHANGES_PER_SYNC or rows[0]["version"] > self._version + 1)
+            if behind:
+                latest = conn.execute("SELECT MAX(version) FROM catalog_changes").fetchone()[0]
+        except Exception as e:
+            print(f"❌ Catalog cache sync failed: {e}")
+            return
+        finally:
+            conn.close()
+
+        if not rows:
+            return
+        with self._lock:
+            self.stats["syncs"] += 1
+            if behind:
+                self._entries.clear()
+                self._epoch += 1
+                self.stats["full_flushes"] += 1
+                self._version = latest
+                return
+            self._evict({row["product_id"] for row in rows})
+            self._version = rows[-1]["version"]
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = f"{stats['hits'] / lookups:.1%}" if lookups else "n/a"
+        stats["max_entries"] = self.max_entries
+        stats["version"] = self._version
+        stats["enabled"] = self.enabled
+        return stats
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,197 @@
+import csv
+import io
+import json
+import os
+import time
+
+from Database.Repositories.product_repo import ProductRepository
+from models.product_model import Product
+
+# Rows written per executemany / transaction
+IMPORT_BATCH_SIZE = int(os.environ.get("TRADEENGINE_IMPORT_BATCH_SIZE", 1000))
+# Row errors listed in the report; any beyond this are only counted
+MAX_REPORTED_ERRORS = 100
+# A progress line is printed every this many rows
+PROGRESS_EVERY = 10000
+# Rows per chunk handed to the response while exporting
+EXPORT_CHUNK_ROWS = 500
+
+CATALOG_FIELDS = ("id", "name", "price", "image_url", "category", "stock_quantity", "details", "created_at")
+FORMATS = ("csv", "jsonl")
+
+
+def detect_format(filename, default="csv"):
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson", "json"):
+        return "jsonl"
+    return "csv" if extension == "csv" else default
+
+
+# ============================================
+# Import
+# ============================================
+class ImportReport:
+    """Outcome of one import: counts plus the first MAX_REPORTED_ERRORS (line, message) errors."""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 2),
+        }
+
+
+def _records(stream, fmt):
+    # (line number, record or None, parse error or None) for each row of a binary upload
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+
+    for number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line), None
+        except json.JSONDecodeError as e:
+            yield number, None, f"invalid JSON: {e.msg}"
+
+
+def _product_row(record):
+    # Validates one record with the Product model's rules; returns the bulk_upsert row
+    if not isinstance(record, dict):
+        raise ValueError("Expected an object.")
+
+    name = str(record.get("name") or "").strip()
+    category = str(record.get("category") or "").strip()
+    if not name:
+        raise ValueError("name is required.")
+    if not category:
+        raise ValueError("category is required.")
+    if record.get("price") in (None, ""):
+        raise ValueError("price is required.")
+
+    product_id = record.get("id")
+    if product_id in (None, ""):
+        product_id = None
+    else:
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            raise ValueError("id must be an integer.")
+
+    details = record.get("details") or {}
+    if isinstance(details, str):
+        try:
+            details = json.loads(details) if details.strip() else {}
+        except json.JSONDecodeError:
+            raise ValueError("details must be a JSON object.")
+    if not isinstance(details, dict):
+        raise ValueError("details must be a JSON object.")
+
+    stock = record.get("stock_quantity")
+    product = Product(product_id, name, record.get("price"), record.get("image_url") or None,
+                      category, 0 if stock in (None, "") else stock, details)
+    return (product.id, product.name, product.price, product.image_url, product.category,
+            product.stock_quantity, json.dumps(product.details))
+
+
+def import_catalog(stream, fmt="csv", batch_size=IMPORT_BATCH_SIZE):
+    """
+    Streams a CSV (header row, CATALOG_FIELDS columns) or JSONL upload into
+    products, batch_size rows per transaction. Rows with an id update that
+    product, the rest are inserted; created_at is ignored. Bad rows are
+    reported by line and skipped. Returns an ImportReport.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    report = ImportReport()
+    started = time.perf_counter()
+    batch, lines = [], []
+
+    def flush():
+        failures = ProductRepository.bulk_upsert(batch)
+        if failures is None:
+            for line in lines:
+                report.error(line, "batch could not be written")
+        else:
+            report.imported += len(batch) - len(failures)
+            for index, message in failures.items():
+                report.error(lines[index], message)
+        batch.clear()
+        lines.clear()
+
+    for line, record, parse_error in _records(stream, fmt):
+        report.rows += 1
+        try:
+            if parse_error:
+                raise ValueError(parse_error)
+            batch.append(_product_row(record))
+            lines.append(line)
+        except (TypeError, ValueError) as e:
+            report.error(line, str(e))
+
+        if len(batch) >= batch_size:
+            flush()
+        if report.rows % PROGRESS_EVERY == 0:
+            print(f"📥 Catalog import: {report.rows} rows read, {report.imported} imported, {report.failed} failed")
+
+    if batch:
+        flush()
+
+    report.seconds = time.perf_counter() - started
+    print(f"✅ Catalog import done: {report.imported}/{report.rows} rows in {report.seconds:.1f}s ({report.failed} failed)")
+    return report
+
+
+# ============================================
+# Export
+# ============================================
+def _export_record(row):
+    record = {field: row[field] for field in CATALOG_FIELDS}
+    try:
+        record["details"] = json.loads(row["details"]) if row["details"] else {}
+    except json.JSONDecodeError:
+        record["details"] = {}
+    return record
+
+
+def export_catalog(fmt="csv"):
+    """Yields the whole catalog as text chunks (CSV with a header row, or JSONL); the same layout import_catalog reads."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(CATALOG_FIELDS)
+
+    for count, row in enumerate(ProductRepository.iter_product_rows(), 1):
+        if fmt == "csv":
+            writer.writerow([row[field] for field in CATALOG_FIELDS])
+        else:
+            buffer.write(json.dumps(_export_record(row), ensure_ascii=False) + "\n")
+
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
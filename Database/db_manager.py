@@ -1,46 +1,621 @@
 import sqlite3
 import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from flask import g, has_app_context
+
+from Database import query_profiler
+from Database.write_queue import WriteQueue, WRITE_QUEUE_ENABLED
+from Database.storage_profile import CheckpointManager, STORAGE_PROFILE, apply_profile, get_profile, uses_wal
+from Database.read_snapshot import SnapshotRefresher, READ_SNAPSHOT_ENABLED
+from Database.async_executor import AsyncExecutor, ASYNC_WORKERS
+from Database.order_archive import OrderArchive, ARCHIVE_AFTER_DAYS, cutoff_for
 
 # Naming the database
 db_name="TradeEngine.db"
 # Determine paths relative to this file location
 base_dir = os.path.dirname(os.path.abspath(__file__))
-db_path = os.path.join(base_dir, db_name)
+db_path = os.environ.get("TRADEENGINE_DB_PATH", os.path.join(base_dir, db_name))
 schema_path = os.path.join(base_dir, 'schema.sql')
+migrations_dir = os.path.join(base_dir, 'migrations')
+# Monthly archive files of closed orders (see order_archive.py)
+archive_dir = os.environ.get("TRADEENGINE_ARCHIVE_DIR", os.path.join(os.path.dirname(db_path), "archive"))
 
-def get_connection():
-    # Opens and returns a database connection.
-    conn = sqlite3.connect(db_path, timeout = 10)
+# Connection pool settings (per process)
+POOL_MAX_SIZE = int(os.environ.get("TRADEENGINE_POOL_SIZE", 8))
+POOL_WAIT_TIMEOUT = 10
+# Prepared statements kept per connection (sqlite3 default is 128). The
+# repositories use a few hundred distinct SQL strings at most, so with pooled
+# connections nearly every execute() skips sqlite3_prepare.
+STATEMENT_CACHE_SIZE = 256
+# Seconds run_write() waits for a write job before giving up on it
+WRITE_TIMEOUT = float(os.environ.get("TRADEENGINE_WRITE_TIMEOUT", 30))
+
+
+_storage_profile = STORAGE_PROFILE
+
+
+def _open_connection():
+    # Opens a brand new raw database connection.
+    conn = sqlite3.connect(db_path, timeout = 10, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
     # This line enables accessing columns by name instead of index (Very Important)
     conn.row_factory = sqlite3.Row
+    apply_profile(conn, _storage_profile)
+    return conn
+
+
+def _open_serving_connection():
+    # Read-write connection for the pool and the writer thread. The WAL
+    # checkpointer starts here, on first use by a serving process, never from
+    # migrate() or other one-off connections (e.g. in the gunicorn master).
+    conn = _open_connection()
+    if uses_wal(_storage_profile):
+        _checkpointer.ensure_started()
+    return conn
+
+
+def _open_read_connection():
+    # Opens a read-only connection: writes fail instead of taking the write lock.
+    conn = sqlite3.connect(f"file:{quote(db_path)}?mode=ro", uri=True, timeout = 10,
+                           check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.row_factory = sqlite3.Row
+    apply_profile(conn, _storage_profile, read_only=True)
+    conn.execute("PRAGMA query_only = ON")
     return conn
 
+
+_checkpointer = CheckpointManager(_open_connection, db_path)
+
+
+# ============================================
+# Pooled Connection Wrapper
+# ============================================
+class PooledConnection:
+    """
+    Thin proxy around a sqlite3.Connection handed out by the pool.
+    Repositories keep calling conn.close() as before; for pooled connections
+    that hands the connection back instead of tearing it down.
+    """
+
+    def __init__(self, pool, raw_conn):
+        self._pool = pool
+        self._conn = raw_conn
+        self._depth = 0
+        self._request_scoped = False
+        self._generation = pool._generation
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self):
+        return query_profiler.wrap_cursor(self._conn.cursor())
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def __enter__(self):
+        # "with conn as c:" keeps c on the proxy (profiled cursors, pooled close)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Same as sqlite3.Connection: commit on success, roll back on error
+        if exc_type is None:
+            self._conn.commit()
+        else:
+            self._conn.rollback()
+        return False
+
+    def close(self):
+        if self._conn is None:
+            return
+        self._depth -= 1
+        if self._depth > 0:
+            return
+        # Never leak a half-finished transaction to the next borrower
+        if self._conn.in_transaction:
+            self._conn.rollback()
+        if not self._request_scoped:
+            self._pool.release(self)
+
+    def _discard(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+
+
+# ============================================
+# Connection Pool
+# ============================================
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections for one process.
+    After a fork (gunicorn workers) the child drops everything it inherited
+    and starts with an empty pool, so no connection is shared across processes.
+    """
+
+    def __init__(self, factory, max_size=POOL_MAX_SIZE, wait_timeout=POOL_WAIT_TIMEOUT):
+        self._factory = factory
+        self.max_size = max_size
+        self.wait_timeout = wait_timeout
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = []
+        self._in_use = 0
+        self._created = 0
+        self.stats = {
+            "checkouts": 0,
+            "created": 0,
+            "waits": 0,
+            "wait_time_ms": 0.0,
+            "timeouts": 0,
+            "high_water": 0,
+            "discarded": 0,
+        }
+
+    def _after_fork(self):
+        # Inherited sqlite handles must not be used (or closed) by the child.
+        self._cond = threading.Condition()
+        self._reset()
+
+    def acquire(self):
+        if self._pid != os.getpid():
+            self._after_fork()
+
+        with self._cond:
+            if not self._idle and self._created >= self.max_size:
+                self.stats["waits"] += 1
+                started = time.perf_counter()
+                deadline = started + self.wait_timeout
+                while not self._idle and self._created >= self.max_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self.stats["timeouts"] += 1
+                        raise sqlite3.OperationalError("Timed out waiting for a pooled database connection")
+                    self._cond.wait(remaining)
+                self.stats["wait_time_ms"] += (time.perf_counter() - started) * 1000
+
+            if self._idle:
+                pooled = self._idle.pop()
+            else:
+                pooled = PooledConnection(self, None)
+                self._created += 1
+                self.stats["created"] += 1
+
+            self._in_use += 1
+            self.stats["checkouts"] += 1
+            self.stats["high_water"] = max(self.stats["high_water"], self._in_use)
+
+        if pooled._conn is None:
+            try:
+                pooled._generation = self._generation
+                pooled._conn = self._factory()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        pooled._depth = 1
+        return pooled
+
+    def release(self, pooled):
+        if self._pid != os.getpid():
+            return
+        if pooled._generation != self._generation:
+            # Opened before close_all(): settings or target file changed since
+            self.discard(pooled)
+            return
+        with self._cond:
+            self._in_use -= 1
+            pooled._request_scoped = False
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def discard(self, pooled):
+        pooled._discard()
+        with self._cond:
+            self._in_use -= 1
+            self._created -= 1
+            self.stats["discarded"] += 1
+            self._cond.notify()
+
+    def close_all(self):
+        # Closes idle connections; ones in use are discarded when handed back.
+        with self._cond:
+            self._generation += 1
+            for pooled in self._idle:
+                pooled._discard()
+            self._created -= len(self._idle)
+            self._idle = []
+
+    def get_stats(self):
+        with self._cond:
+            data = dict(self.stats)
+            data["in_use"] = self._in_use
+            data["idle"] = len(self._idle)
+            data["size"] = self._created
+            data["max_size"] = self.max_size
+        return data
+
+
+_pool = ConnectionPool(_open_serving_connection)
+_read_pool = ConnectionPool(_open_read_connection)
+
+_snapshot = SnapshotRefresher(_open_read_connection, db_path + ".snapshot")
+_snapshot_pool = ConnectionPool(_snapshot.open_connection)
+_snapshot.on_refresh = _snapshot_pool.close_all
+_use_read_snapshot = READ_SNAPSHOT_ENABLED
+
+_REQUEST_POOLS = (("_db_conn", _pool), ("_db_read_conn", _read_pool), ("_db_snapshot_conn", _snapshot_pool))
+
+if hasattr(os, "register_at_fork"):
+    for _key, _fork_pool in _REQUEST_POOLS:
+        os.register_at_fork(after_in_child=_fork_pool._after_fork)
+
+
+# Connections held by the current async task (see run_async)
+_async_scope = threading.local()
+# Async tasks read from their own pool, sized so every worker holds one connection
+_async_read_pool = ConnectionPool(_open_read_connection, max_size=ASYNC_WORKERS)
+_ASYNC_POOLS = (("_db_conn", _pool), ("_db_read_conn", _async_read_pool))
+
+
+def _in_async_task():
+    return getattr(_async_scope, "active", False)
+
+
+def _connection_scope():
+    # Where shared connections live: the async task's thread, the Flask
+    # request (g), or nowhere (scripts, CLI).
+    if _in_async_task():
+        return _async_scope
+    if has_app_context():
+        return g
+    return None
+
+
+def _scoped_connection(pool, key):
+    # Inside a Flask request (or an async task) every call shares one pooled
+    # connection per pool that is handed back at the end of the scope; outside
+    # one, close() returns it.
+    scope = _connection_scope()
+    if scope is not None:
+        pooled = getattr(scope, key, None)
+        if pooled is None or pooled._conn is None:
+            pooled = pool.acquire()
+            pooled._request_scoped = True
+            setattr(scope, key, pooled)
+        else:
+            pooled._depth += 1
+        return pooled
+    return pool.acquire()
+
+
+def get_connection():
+    # Returns a read-write database connection.
+    return _scoped_connection(_pool, "_db_conn")
+
+
+def get_read_connection(allow_snapshot=True, scoped=True):
+    # Returns a read-only connection (mode=ro + query_only) for SELECT-only work.
+    # Views marked with prefer_snapshot_reads() read from the snapshot copy instead,
+    # unless the caller needs the live data (allow_snapshot=False).
+    # scoped=False borrows a connection that close() hands straight back, even
+    # inside a request: for streamed responses that outlive the view.
+    if not scoped:
+        return _read_pool.acquire()
+    if _in_async_task():
+        return _scoped_connection(_async_read_pool, "_db_read_conn")
+    if allow_snapshot and reads_from_snapshot():
+        if _snapshot.is_available():
+            _snapshot.ensure_started()
+            return _scoped_connection(_snapshot_pool, "_db_snapshot_conn")
+        _snapshot.ensure_started()
+    return _scoped_connection(_read_pool, "_db_read_conn")
+
+
+def prefer_snapshot_reads():
+    # Reporting views call this so their long scans never hold locks on the live DB.
+    g._db_prefer_snapshot = True
+
+
+def reads_from_snapshot():
+    # True when get_read_connection() may return the (possibly stale) snapshot copy.
+    return (_use_read_snapshot and not _in_async_task()
+            and has_app_context() and bool(g.get("_db_prefer_snapshot")))
+
+
+def _release_scoped(scope, pools):
+    for key, pool in pools:
+        pooled = getattr(scope, key, None)
+        if pooled is None:
+            continue
+        delattr(scope, key)
+        if pooled._conn is None:
+            continue
+        try:
+            if pooled._conn.in_transaction:
+                pooled._conn.rollback()
+        except sqlite3.Error:
+            pool.discard(pooled)
+            continue
+        pool.release(pooled)
+
+
+def release_request_connection(exception=None):
+    # Teardown hook: give the request's connections back to their pools.
+    _release_scoped(g, _REQUEST_POOLS)
+
+
+def get_pool_stats():
+    return _pool.get_stats()
+
+
+def get_read_pool_stats():
+    return _read_pool.get_stats()
+
+
+def get_snapshot_stats():
+    if not _use_read_snapshot:
+        return None
+    return _snapshot.get_stats()
+
+
+# ============================================
+# Write Path
+# ============================================
+_write_queue = WriteQueue(_open_serving_connection)
+_use_write_queue = WRITE_QUEUE_ENABLED
+
+
+def _run_inline(job):
+    # Same contract as a queued job, executed on the caller's pooled connection.
+    conn = get_connection()
+    try:
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        result = job(conn)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def submit_write(job):
+    # Runs job(conn) in a write transaction and returns a Future with its result.
+    # With the write queue enabled the job is batched on the single writer thread.
+    if _use_write_queue:
+        return _write_queue.submit(job)
+
+    future = Future()
+    try:
+        future.set_result(_run_inline(job))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def run_write(job, timeout=WRITE_TIMEOUT):
+    # Blocking variant of submit_write(): returns the job's result or raises its error
+    # (TimeoutError when it has not finished within timeout seconds).
+    return submit_write(job).result(timeout)
+
+
+def set_storage_profile(name):
+    # Switches the pragmas applied to new connections; idle ones are reopened lazily.
+    global _storage_profile
+    get_profile(name)
+    if name != _storage_profile:
+        _storage_profile = name
+        _pool.close_all()
+        _read_pool.close_all()
+        _async_read_pool.close_all()
+
+
+def get_storage_stats():
+    data = {"profile": _storage_profile}
+    if uses_wal(_storage_profile):
+        data.update(_checkpointer.get_stats())
+    return data
+
+
+def checkpoint(mode="PASSIVE"):
+    # Manual WAL checkpoint (e.g. before a backup); returns (busy, log, checkpointed).
+    conn = _open_connection()
+    try:
+        return _checkpointer.checkpoint(conn, mode)
+    finally:
+        conn.close()
+
+
+def get_write_queue_stats():
+    if not _use_write_queue:
+        return None
+    return _write_queue.get_stats()
+
+
+# ============================================
+# Async Repository Calls
+# ============================================
+@contextmanager
+def _async_task_scope():
+    # Runs on an executor thread: connections opened by the task are shared
+    # for its duration and handed back when it finishes.
+    _async_scope.active = True
+    try:
+        yield
+    finally:
+        _async_scope.active = False
+        _release_scoped(_async_scope, _ASYNC_POOLS)
+
+
+_async_executor = AsyncExecutor(_async_task_scope)
+
+
+def run_async(func, *args, **kwargs):
+    # Awaitable variant of func(*args, **kwargs) for async views; at most
+    # ASYNC_WORKERS calls run at once, reading from their own pool.
+    return _async_executor.run(func, *args, **kwargs)
+
+
+def get_async_stats():
+    return _async_executor.get_stats()
+
+
+def get_async_pool_stats():
+    return _async_read_pool.get_stats()
+
+
+# ============================================
+# Order Archive
+# ============================================
+order_archive = OrderArchive(archive_dir)
+
+
+def archive_orders(older_than_days=ARCHIVE_AFTER_DAYS):
+    # Moves closed orders older than the cutoff into the monthly archive files.
+    # Runs on a private connection: ATTACH cannot happen inside the write
+    # queue's batch transaction, and BEGIN IMMEDIATE waits for the writer.
+    conn = _open_connection()
+    try:
+        return order_archive.archive(conn, cutoff_for(older_than_days))
+    finally:
+        conn.close()
+
+
+def get_archive_stats():
+    conn = get_read_connection()
+    try:
+        row = conn.execute(
+            "SELECT COUNT(*) AS partitions, COALESCE(SUM(order_count), 0) AS archived_orders, "
+            "MIN(month) AS oldest, MAX(month) AS newest FROM order_partitions"
+        ).fetchone()
+        return dict(row) if row["partitions"] else None
+    finally:
+        conn.close()
+
+
+def init_app(app):
+    # Wires request-scoped connection handling (and SQL profiling) into a Flask app.
+    global _use_write_queue, _use_read_snapshot
+    _use_write_queue = app.config.get("WRITE_QUEUE", WRITE_QUEUE_ENABLED)
+    _use_read_snapshot = app.config.get("READ_SNAPSHOT", READ_SNAPSHOT_ENABLED)
+    set_storage_profile(app.config.get("STORAGE_PROFILE", _storage_profile))
+    app.teardown_appcontext(release_request_connection)
+    query_profiler.init_app(app)
+
+
+# ============================================
+# Schema Migrations
+# ============================================
+# Version 1 is the baseline schema.sql; every later step lives in
+# migrations/NNNN_description.sql. The applied version is kept in
+# PRAGMA user_version, so a current database costs a single read.
+
+def _load_migrations():
+    steps = [(1, "initial_schema", schema_path)]
+    if os.path.isdir(migrations_dir):
+        for file_name in sorted(os.listdir(migrations_dir)):
+            if file_name.endswith(".sql") and file_name[:4].isdigit():
+                version = int(file_name[:4])
+                steps.append((version, file_name[5:-4], os.path.join(migrations_dir, file_name)))
+    return steps
+
+
+def _split_statements(script):
+    # Splits a SQL script into complete statements (trigger bodies stay intact).
+    statements = []
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+    return statements
+
+
+def get_schema_version(conn=None):
+    own_conn = conn is None
+    if own_conn:
+        conn = _open_connection()
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def migrate():
+    # Applies every pending migration, one transaction per step.
+    # Returns the number of steps applied (0 when the database is current).
+    steps = _load_migrations()
+    latest = steps[-1][0]
+
+    conn = _open_connection()
+    applied = 0
+    try:
+        if get_schema_version(conn) >= latest:
+            return 0
+
+        for version, name, path in steps:
+            # BEGIN IMMEDIATE serializes workers racing on the same step
+            conn.execute("BEGIN IMMEDIATE")
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+
+            print(f"⚙️  Applying migration {version:04d} ({name})...")
+            with open(path, 'r', encoding='utf-8') as f:
+                for statement in _split_statements(f.read()):
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+            applied += 1
+        return applied
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
 def init_schema():
-    # Reads schema.sql file and executes it to build tables.
-    print(f"⚙️  Initializing database at: {db_path}...")
-    
+    # Brings the database up to the latest schema version.
     if not os.path.exists(schema_path):
         print(f"❌ Error: schema.sql not found at {schema_path}")
         return
 
     try:
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            schema_sql = f.read()
-
-        conn = get_connection()
-        cursor = conn.cursor()
-        # executescript runs the entire SQL script at once
-        cursor.executescript(schema_sql)
-        conn.commit()
-        conn.close()
-        print("✅ Database schema initialized successfully!")
-        print("✅ All 5 tables created successfully.")
-        
+        applied = migrate()
+        if applied:
+            print(f"✅ Database at {db_path} migrated to version {get_schema_version()} ({applied} step(s)).")
     except Exception as e:
-        print(f"❌ Database initialization failed: {e}")
+        print(f"❌ Database migration failed: {e}")
 
 # This block is for testing running the file directly
 if __name__ == "__main__":
     # Uncomment the next line if you want to delete the old DB and start fresh
     # if os.path.exists(db_path): os.remove(db_path)
-    init_schema()
\ No newline at end of file
+    init_schema()
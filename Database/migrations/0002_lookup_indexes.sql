@@ -0,0 +1,24 @@
+-- ============================================
+-- Secondary indexes for the repository queries
+-- ============================================
+
+-- CartRepository: every lookup filters by user, most by (user, product)
+CREATE INDEX IF NOT EXISTS idx_cart_items_user_product ON cart_items (user_id, product_id);
+
+-- OrderRepository.get_order_details / checkout API item lookups
+CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id);
+
+-- OrderRepository.get_user_orders: WHERE user_id = ? ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders (user_id, created_at);
+
+-- OrderRepository.get_all_orders: ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at);
+
+-- ReviewRepository.get_reviews_by_product: WHERE product_id = ? ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_reviews_product_created ON reviews (product_id, created_at);
+
+-- ProductRepository listings: ORDER BY category, <sort column> (one per ALLOWED_SORT_COLUMNS)
+CREATE INDEX IF NOT EXISTS idx_products_category_created ON products (category, created_at);
+CREATE INDEX IF NOT EXISTS idx_products_category_price ON products (category, price);
+CREATE INDEX IF NOT EXISTS idx_products_category_name ON products (category, name);
+CREATE INDEX IF NOT EXISTS idx_products_category_stock ON products (category, stock_quantity);
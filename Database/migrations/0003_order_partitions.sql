@@ -0,0 +1,19 @@
+-- ============================================
+-- Archived order partitions (see Database/order_archive.py)
+-- ============================================
+
+-- One row per monthly archive file; the id / created_at ranges let readers
+-- skip files that cannot contain what they are looking for.
+CREATE TABLE IF NOT EXISTS order_partitions (
+    month TEXT PRIMARY KEY,          -- 'YYYY-MM'
+    file_name TEXT NOT NULL,         -- relative to the archive directory
+    min_order_id INTEGER NOT NULL,
+    max_order_id INTEGER NOT NULL,
+    min_created_at TIMESTAMP NOT NULL,
+    max_created_at TIMESTAMP NOT NULL,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    total_amount REAL NOT NULL DEFAULT 0,  -- SUM(total_amount) of the file's orders
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_order_partitions_ids ON order_partitions (min_order_id, max_order_id);
@@ -0,0 +1,37 @@
+-- ============================================
+-- Catalog change log (see Database/catalog_cache.py)
+-- ============================================
+
+-- Every write to products appends a row, whoever makes it (repositories,
+-- checkout, bulk SQL). Each worker's catalog cache polls for versions newer
+-- than the last one it saw and evicts exactly those products.
+CREATE TABLE IF NOT EXISTS catalog_changes (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_products_insert_catalog_changes
+AFTER INSERT ON products
+BEGIN
+    INSERT INTO catalog_changes (product_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_update_catalog_changes
+AFTER UPDATE ON products
+BEGIN
+    INSERT INTO catalog_changes (product_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_delete_catalog_changes
+AFTER DELETE ON products
+BEGIN
+    INSERT INTO catalog_changes (product_id) VALUES (OLD.id);
+END;
+
+-- Keep the log bounded; a worker that falls further behind flushes its whole cache
+CREATE TRIGGER IF NOT EXISTS trg_catalog_changes_prune
+AFTER INSERT ON catalog_changes
+BEGIN
+    DELETE FROM catalog_changes WHERE version <= NEW.version - 10000;
+END;
@@ -0,0 +1,11 @@
+-- ============================================
+-- Keyset pagination over the whole catalog
+-- ============================================
+
+-- ProductRepository.get_all_products_page: ORDER BY <column>, id (rowid is
+-- the implicit last key of every index). Per-category pages use the
+-- idx_products_category_* indexes from 0002.
+CREATE INDEX IF NOT EXISTS idx_products_created ON products (created_at);
+CREATE INDEX IF NOT EXISTS idx_products_price ON products (price);
+CREATE INDEX IF NOT EXISTS idx_products_name ON products (name);
+CREATE INDEX IF NOT EXISTS idx_products_stock ON products (stock_quantity);
@@ -0,0 +1,53 @@
+-- ============================================
+-- Full-text product search (ProductRepository.search_catalog)
+-- ============================================
+
+-- rowid = products.id. details holds the scalar values of the details JSON
+-- (brand, power, ...), flattened to text. prefix indexes make "dri*" as
+-- cheap as a whole-word match.
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name,
+    category,
+    details,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_products_insert_fts
+AFTER INSERT ON products
+BEGIN
+    INSERT INTO products_fts (rowid, name, category, details)
+    VALUES (
+        NEW.id, NEW.name, NEW.category,
+        (SELECT group_concat(value, ' ') FROM json_tree(CASE WHEN json_valid(NEW.details) THEN NEW.details ELSE '{}' END)
+         WHERE type IN ('text', 'integer', 'real'))
+    );
+END;
+
+-- Stock and price updates (every checkout) do not touch the index
+CREATE TRIGGER IF NOT EXISTS trg_products_update_fts
+AFTER UPDATE OF name, category, details ON products
+BEGIN
+    DELETE FROM products_fts WHERE rowid = OLD.id;
+    INSERT INTO products_fts (rowid, name, category, details)
+    VALUES (
+        NEW.id, NEW.name, NEW.category,
+        (SELECT group_concat(value, ' ') FROM json_tree(CASE WHEN json_valid(NEW.details) THEN NEW.details ELSE '{}' END)
+         WHERE type IN ('text', 'integer', 'real'))
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_delete_fts
+AFTER DELETE ON products
+BEGIN
+    DELETE FROM products_fts WHERE rowid = OLD.id;
+END;
+
+-- Index the existing catalog
+DELETE FROM products_fts;
+INSERT INTO products_fts (rowid, name, category, details)
+SELECT
+    p.id, p.name, p.category,
+    (SELECT group_concat(value, ' ') FROM json_tree(CASE WHEN json_valid(p.details) THEN p.details ELSE '{}' END)
+     WHERE type IN ('text', 'integer', 'real'))
+FROM products p;
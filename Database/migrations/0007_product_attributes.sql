@@ -0,0 +1,49 @@
+-- ============================================
+-- Attribute index over products.details (ProductRepository.filter_products)
+-- ============================================
+
+-- One row per top-level scalar in the details JSON: {"brand": "Bosch"}
+-- becomes (product_id, 'brand', 'Bosch'). Names are lower-cased so "Brand"
+-- and "brand" are the same facet.
+CREATE TABLE IF NOT EXISTS product_attributes (
+    product_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (name, value, product_id)
+) WITHOUT ROWID;
+
+-- Attributes of one product (trigger maintenance, facet joins)
+CREATE INDEX IF NOT EXISTS idx_product_attributes_product ON product_attributes (product_id);
+
+CREATE TRIGGER IF NOT EXISTS trg_products_insert_attributes
+AFTER INSERT ON products
+BEGIN
+    INSERT OR IGNORE INTO product_attributes (product_id, name, value)
+    SELECT NEW.id, lower(trim(key)), CAST(value AS TEXT)
+    FROM json_each(CASE WHEN json_valid(NEW.details) THEN NEW.details ELSE '{}' END)
+    WHERE type IN ('text', 'integer', 'real') AND trim(CAST(value AS TEXT)) != '';
+END;
+
+-- Only details edits re-index (stock / price updates do not touch the table)
+CREATE TRIGGER IF NOT EXISTS trg_products_update_attributes
+AFTER UPDATE OF details ON products
+BEGIN
+    DELETE FROM product_attributes WHERE product_id = OLD.id;
+    INSERT OR IGNORE INTO product_attributes (product_id, name, value)
+    SELECT NEW.id, lower(trim(key)), CAST(value AS TEXT)
+    FROM json_each(CASE WHEN json_valid(NEW.details) THEN NEW.details ELSE '{}' END)
+    WHERE type IN ('text', 'integer', 'real') AND trim(CAST(value AS TEXT)) != '';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_delete_attributes
+AFTER DELETE ON products
+BEGIN
+    DELETE FROM product_attributes WHERE product_id = OLD.id;
+END;
+
+-- Index the existing catalog
+DELETE FROM product_attributes;
+INSERT OR IGNORE INTO product_attributes (product_id, name, value)
+SELECT p.id, lower(trim(j.key)), CAST(j.value AS TEXT)
+FROM products p, json_each(CASE WHEN json_valid(p.details) THEN p.details ELSE '{}' END) j
+WHERE j.type IN ('text', 'integer', 'real') AND trim(CAST(j.value AS TEXT)) != '';
@@ -0,0 +1,82 @@
+-- ============================================
+-- Category summary (ProductRepository.get_category_summaries)
+-- ============================================
+
+-- One row per category with live counts and price range, kept current by
+-- the triggers below so the storefront and admin forms never scan products.
+-- Counts are adjusted in place; min/max are re-read from the
+-- idx_products_category_price index (one seek each) when a price leaves.
+CREATE TABLE IF NOT EXISTS categories (
+    name TEXT PRIMARY KEY,
+    product_count INTEGER NOT NULL DEFAULT 0,
+    in_stock_count INTEGER NOT NULL DEFAULT 0,
+    min_price REAL,
+    max_price REAL
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_insert_categories
+AFTER INSERT ON products
+WHEN NEW.category IS NOT NULL AND NEW.category != ''
+BEGIN
+    INSERT INTO categories (name, product_count, in_stock_count, min_price, max_price)
+    VALUES (NEW.category, 1, COALESCE(NEW.stock_quantity, 0) > 0, NEW.price, NEW.price)
+    ON CONFLICT (name) DO UPDATE SET
+        product_count = product_count + 1,
+        in_stock_count = in_stock_count + excluded.in_stock_count,
+        min_price = MIN(COALESCE(min_price, excluded.min_price), excluded.min_price),
+        max_price = MAX(COALESCE(max_price, excluded.max_price), excluded.max_price);
+END;
+
+-- Stock moves (every checkout): only the in-stock count can change
+CREATE TRIGGER IF NOT EXISTS trg_products_update_categories_stock
+AFTER UPDATE OF stock_quantity ON products
+WHEN OLD.category IS NEW.category AND OLD.price IS NEW.price
+    AND (COALESCE(OLD.stock_quantity, 0) > 0) != (COALESCE(NEW.stock_quantity, 0) > 0)
+BEGIN
+    UPDATE categories
+    SET in_stock_count = in_stock_count + (COALESCE(NEW.stock_quantity, 0) > 0) - (COALESCE(OLD.stock_quantity, 0) > 0)
+    WHERE name = NEW.category;
+END;
+
+-- Category or price changed: take the product out of the old row, add it to the new one
+CREATE TRIGGER IF NOT EXISTS trg_products_update_categories
+AFTER UPDATE OF category, price ON products
+WHEN OLD.category IS NOT NEW.category OR OLD.price IS NOT NEW.price
+BEGIN
+    UPDATE categories
+    SET product_count = product_count - 1,
+        in_stock_count = in_stock_count - (COALESCE(OLD.stock_quantity, 0) > 0),
+        min_price = (SELECT MIN(price) FROM products WHERE category = OLD.category),
+        max_price = (SELECT MAX(price) FROM products WHERE category = OLD.category)
+    WHERE name = OLD.category;
+    DELETE FROM categories WHERE name = OLD.category AND product_count <= 0;
+
+    INSERT INTO categories (name, product_count, in_stock_count, min_price, max_price)
+    SELECT NEW.category, 1, COALESCE(NEW.stock_quantity, 0) > 0, NEW.price, NEW.price
+    WHERE NEW.category IS NOT NULL AND NEW.category != ''
+    ON CONFLICT (name) DO UPDATE SET
+        product_count = product_count + 1,
+        in_stock_count = in_stock_count + excluded.in_stock_count,
+        min_price = MIN(COALESCE(min_price, excluded.min_price), excluded.min_price),
+        max_price = MAX(COALESCE(max_price, excluded.max_price), excluded.max_price);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_delete_categories
+AFTER DELETE ON products
+BEGIN
+    UPDATE categories
+    SET product_count = product_count - 1,
+        in_stock_count = in_stock_count - (COALESCE(OLD.stock_quantity, 0) > 0),
+        min_price = (SELECT MIN(price) FROM products WHERE category = OLD.category),
+        max_price = (SELECT MAX(price) FROM products WHERE category = OLD.category)
+    WHERE name = OLD.category;
+    DELETE FROM categories WHERE name = OLD.category AND product_count <= 0;
+END;
+
+-- Summarize the existing catalog
+DELETE FROM categories;
+INSERT INTO categories (name, product_count, in_stock_count, min_price, max_price)
+SELECT category, COUNT(*), SUM(COALESCE(stock_quantity, 0) > 0), MIN(price), MAX(price)
+FROM products
+WHERE category IS NOT NULL AND category != ''
+GROUP BY category;
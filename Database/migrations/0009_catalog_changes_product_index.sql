@@ -0,0 +1,6 @@
+-- ============================================
+-- Per-product catalog versions (HTTP validators for /product/<id>)
+-- ============================================
+
+-- ProductRepository.get_product_version: latest change of one product
+CREATE INDEX IF NOT EXISTS idx_catalog_changes_product ON catalog_changes (product_id, version);
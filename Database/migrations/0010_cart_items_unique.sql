@@ -0,0 +1,20 @@
+-- ============================================
+-- One cart line per (user, product): CartRepository.add_or_update_item upserts
+-- ============================================
+
+-- Merge duplicate lines left by the old read-then-write path into the oldest one
+UPDATE cart_items
+SET quantity = (
+    SELECT SUM(c.quantity) FROM cart_items c
+    WHERE c.user_id = cart_items.user_id AND c.product_id = cart_items.product_id
+)
+WHERE id IN (
+    SELECT MIN(id) FROM cart_items GROUP BY user_id, product_id HAVING COUNT(*) > 1
+);
+
+DELETE FROM cart_items
+WHERE id NOT IN (SELECT MIN(id) FROM cart_items GROUP BY user_id, product_id);
+
+-- The unique index replaces the plain lookup index from 0002
+DROP INDEX IF EXISTS idx_cart_items_user_product;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_cart_items_user_product ON cart_items (user_id, product_id);
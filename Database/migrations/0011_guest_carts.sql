@@ -0,0 +1,17 @@
+-- ============================================
+-- Server-side carts for anonymous visitors (CartRepository.*guest*)
+-- ============================================
+
+-- The session cookie only carries the opaque token; the lines live here
+-- until the visitor logs in (merged into cart_items) or the cart expires.
+CREATE TABLE IF NOT EXISTS guest_cart_items (
+    token TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL CHECK(quantity > 0),
+    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (token, product_id)
+) WITHOUT ROWID;
+
+-- CartRepository.prune_guest_carts
+CREATE INDEX IF NOT EXISTS idx_guest_cart_items_updated ON guest_cart_items (updated_at);
@@ -0,0 +1,219 @@
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+# Closed orders older than this move out of the hot database
+ARCHIVE_AFTER_DAYS = int(os.environ.get("TRADEENGINE_ARCHIVE_AFTER_DAYS", 90))
+# Statuses that can no longer change (compared case-insensitively)
+CLOSED_STATUSES = ("delivered", "cancelled")
+# SQLite attaches at most 10 databases per connection by default; keep a spare
+MAX_ATTACHED = 9
+
+ORDER_COLUMNS = "id, user_id, total_amount, shipping_address, payment_method, status, created_at"
+ITEM_COLUMNS = "id, order_id, product_id, quantity, price_at_purchase"
+
+# Partition files hold plain copies: users/products stay in the hot database
+PARTITION_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS {schema}.orders (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        total_amount REAL NOT NULL,
+        shipping_address TEXT NOT NULL,
+        payment_method TEXT NOT NULL,
+        status TEXT,
+        created_at TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS {schema}.order_items (
+        id INTEGER PRIMARY KEY,
+        order_id INTEGER NOT NULL,
+        product_id INTEGER,
+        quantity INTEGER NOT NULL,
+        price_at_purchase REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_orders_user_created ON orders (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_orders_created ON orders (created_at)",
+    "CREATE INDEX IF NOT EXISTS {schema}.idx_order_items_order ON order_items (order_id)",
+)
+
+
+def cutoff_for(older_than_days=ARCHIVE_AFTER_DAYS):
+    # Same text format as CURRENT_TIMESTAMP, so it compares directly with created_at
+    return (datetime.utcnow() - timedelta(days=older_than_days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+# ============================================
+# Order Archive
+# ============================================
+class OrderArchive:
+    """
+    Monthly partitions of closed orders, one SQLite file per month.
+
+    archive() moves delivered/cancelled orders older than a cutoff (and their
+    items) out of the hot database into orders_YYYY-MM.db and records each
+    file's id and created_at range in the order_partitions table. Readers
+    call read() with the SQL for one schema: the hot tables are always
+    queried, and partition files are ATTACHed read-only only when their
+    range overlaps the requested dates.
+    """
+
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+
+    def path_for(self, file_name):
+        return os.path.join(self.archive_dir, file_name)
+
+    # =========================
+    # Archiving (writer side)
+    # =========================
+    def archive(self, conn, cutoff):
+        # conn: a private read-write connection with no open transaction
+        # (ATTACH is not allowed inside one). Returns {month: orders moved}.
+        closed = ", ".join("?" for _ in CLOSED_STATUSES)
+        where = f"lower(status) IN ({closed}) AND created_at < ?"
+        params = (*CLOSED_STATUSES, cutoff)
+
+        months = conn.execute(
+            f"SELECT strftime('%Y-%m', created_at) AS month FROM orders WHERE {where} GROUP BY month",
+            params
+        ).fetchall()
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        moved = {}
+        for (month,) in months:
+            moved[month] = self._archive_month(conn, month, f"{where} AND strftime('%Y-%m', created_at) = ?", (*params, month))
+        return moved
+
+    def _archive_month(self, conn, month, where, params):
+        file_name = f"orders_{month}.db"
+        conn.execute("ATTACH DATABASE ? AS archive", (self.path_for(file_name),))
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in PARTITION_SCHEMA:
+                    conn.execute(statement.format(schema="archive"))
+
+                order_ids = f"SELECT id FROM main.orders WHERE {where}"
+                count = conn.execute(
+                    f"INSERT INTO archive.orders ({ORDER_COLUMNS}) "
+                    f"SELECT {ORDER_COLUMNS} FROM main.orders WHERE {where}", params
+                ).rowcount
+                conn.execute(
+                    f"INSERT INTO archive.order_items ({ITEM_COLUMNS}) "
+                    f"SELECT {ITEM_COLUMNS} FROM main.order_items WHERE order_id IN ({order_ids})", params
+                )
+                conn.execute(f"DELETE FROM main.order_items WHERE order_id IN ({order_ids})", params)
+                conn.execute(f"DELETE FROM main.orders WHERE {where}", params)
+
+                conn.execute("""
+                    INSERT INTO main.order_partitions
+                        (month, file_name, min_order_id, max_order_id, min_created_at, max_created_at,
+                         order_count, total_amount)
+                    SELECT ?, ?, MIN(id), MAX(id), MIN(created_at), MAX(created_at), COUNT(*),
+                           COALESCE(SUM(total_amount), 0) FROM archive.orders
+                    WHERE true
+                    ON CONFLICT (month) DO UPDATE SET
+                        min_order_id = excluded.min_order_id,
+                        max_order_id = excluded.max_order_id,
+                        min_created_at = excluded.min_created_at,
+                        max_created_at = excluded.max_created_at,
+                        order_count = excluded.order_count,
+                        total_amount = excluded.total_amount,
+                        archived_at = CURRENT_TIMESTAMP
+                """, (month, file_name))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        finally:
+            conn.execute("DETACH DATABASE archive")
+        print(f"📦 Archived {count} order(s) from {month} into {file_name}.")
+        return count
+
+    # =========================
+    # Reading (any connection)
+    # =========================
+    def partitions(self, conn, since=None, until=None):
+        # Partition files whose created_at range overlaps [since, until]. No
+        # range means the hot tables only: listings must not attach every
+        # archived month (more of them every month) on each call.
+        if since is None and until is None:
+            return []
+        return conn.execute("""
+            SELECT month, file_name FROM order_partitions
+            WHERE (? IS NULL OR max_created_at >= ?) AND (? IS NULL OR min_created_at <= ?)
+            ORDER BY month DESC
+        """, (since, since, until, until)).fetchall()
+
+    def totals(self, conn):
+        # (orders, total_amount) over every archived month, from order_partitions alone
+        row = conn.execute(
+            "SELECT COALESCE(SUM(order_count), 0), COALESCE(SUM(total_amount), 0) FROM order_partitions"
+        ).fetchone()
+        return row[0], row[1]
+
+    def partitions_for_order(self, conn, order_id):
+        return conn.execute(
+            "SELECT month, file_name FROM order_partitions WHERE ? BETWEEN min_order_id AND max_order_id",
+            (order_id,)
+        ).fetchall()
+
+    def partitions_for_orders(self, conn, order_ids):
+        # Partitions whose id range covers any of order_ids
+        return conn.execute("""
+            SELECT month, file_name FROM order_partitions
+            WHERE EXISTS (SELECT 1 FROM json_each(?) WHERE value BETWEEN min_order_id AND max_order_id)
+            ORDER BY month DESC
+        """, (json.dumps(list(order_ids)),)).fetchall()
+
+    @contextmanager
+    def attached(self, conn, partitions):
+        # ATTACHes the partition files read-only; yields their schema names.
+        schemas = []
+        try:
+            for i, partition in enumerate(partitions):
+                schema = f"archive_{i}"
+                uri = f"file:{quote(self.path_for(partition['file_name']))}?mode=ro"
+                conn.execute(f"ATTACH DATABASE ? AS {schema}", (uri,))
+                schemas.append(schema)
+            yield schemas
+        finally:
+            for schema in schemas:
+                try:
+                    conn.execute(f"DETACH DATABASE {schema}")
+                except sqlite3.Error:
+                    pass
+
+    def read(self, conn, sql, params=(), partitions=(), order_by=None, sort_key=None, reverse=False):
+        """
+        Runs sql once per schema and returns the combined rows.
+
+        sql is a single SELECT (no ORDER BY) with {schema} in place of the
+        database name and {archived} for a 0/1 literal. The hot tables and
+        every partition in partitions are combined with UNION ALL; with more
+        partitions than fit on one connection the groups are merged with
+        sort_key.
+        """
+        if not partitions:
+            query = sql.format(schema="main", archived=0)
+            if order_by:
+                query = f"SELECT * FROM ({query}) ORDER BY {order_by}"
+            return conn.execute(query, params).fetchall()
+
+        rows = []
+        groups = [partitions[i:i + MAX_ATTACHED] for i in range(0, len(partitions), MAX_ATTACHED)]
+        for index, group in enumerate(groups):
+            with self.attached(conn, group) as schemas:
+                parts = [sql.format(schema=s, archived=1) for s in schemas]
+                if index == 0:
+                    parts.insert(0, sql.format(schema="main", archived=0))
+                query = f"SELECT * FROM ({' UNION ALL '.join(parts)})"
+                if order_by:
+                    query += f" ORDER BY {order_by}"
+                rows.extend(conn.execute(query, tuple(params) * len(parts)).fetchall())
+
+        if len(groups) > 1 and sort_key:
+            rows.sort(key=sort_key, reverse=reverse)
+        return rows
@@ -0,0 +1,165 @@
+import os
+import time
+import threading
+from collections import deque, Counter
+
+from flask import g, has_app_context, request
+
+# Turn on with TRADEENGINE_SQL_PROFILING=1 (or SQL_PROFILING=True in app config)
+PROFILING_ENABLED = os.environ.get("TRADEENGINE_SQL_PROFILING", "0") == "1"
+# The same statement this many times in one request is flagged as a likely N+1
+REPEAT_THRESHOLD = 3
+# How many finished request profiles to keep for the admin debug page
+HISTORY_SIZE = 50
+
+_history = deque(maxlen=HISTORY_SIZE)
+_history_lock = threading.Lock()
+
+
+# ============================================
+# Records
+# ============================================
+class QueryRecord:
+    __slots__ = ("sql", "duration_ms", "rows")
+
+    def __init__(self, sql):
+        self.sql = " ".join(sql.split())
+        self.duration_ms = 0.0
+        self.rows = 0
+
+
+class RequestProfile:
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.queries = []
+
+    def record(self, sql):
+        record = QueryRecord(sql)
+        self.queries.append(record)
+        return record
+
+    @property
+    def total_ms(self):
+        return sum(q.duration_ms for q in self.queries)
+
+    @property
+    def total_rows(self):
+        return sum(q.rows for q in self.queries)
+
+    def repeated_statements(self, threshold=REPEAT_THRESHOLD):
+        # Identical SQL text executed `threshold`+ times: the N+1 signature.
+        counts = Counter(q.sql for q in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count >= threshold]
+
+    def server_timing(self):
+        value = f'db;dur={self.total_ms:.2f};desc="{len(self.queries)} queries"'
+        repeats = self.repeated_statements()
+        if repeats:
+            value += f', db-repeats;desc="{len(repeats)} repeated statement(s)"'
+        return value
+
+
+# ============================================
+# Cursor Wrapper
+# ============================================
+class ProfiledCursor:
+    """Wraps a sqlite3.Cursor and times execute + fetch for the active request."""
+
+    def __init__(self, cursor, profile):
+        self._cursor = cursor
+        self._profile = profile
+        self._record = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _timed(self, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            if self._record is not None:
+                self._record.duration_ms += (time.perf_counter() - started) * 1000
+
+    def execute(self, sql, parameters=()):
+        self._record = self._profile.record(sql)
+        self._timed(self._cursor.execute, sql, parameters)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._record = self._profile.record(sql)
+        self._timed(self._cursor.executemany, sql, seq_of_parameters)
+        return self
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        if row is not None and self._record is not None:
+            self._record.rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(self._cursor.fetchmany, size or self._cursor.arraysize)
+        if self._record is not None:
+            self._record.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        if self._record is not None:
+            self._record.rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+
+def current_profile():
+    if not has_app_context():
+        return None
+    return g.get("_sql_profile")
+
+
+def wrap_cursor(cursor):
+    profile = current_profile()
+    if profile is None:
+        return cursor
+    return ProfiledCursor(cursor, profile)
+
+
+def get_recent_profiles():
+    with _history_lock:
+        return list(reversed(_history))
+
+
+# ============================================
+# Flask Hooks
+# ============================================
+def _start_profile():
+    g._sql_profile = RequestProfile(request.method, request.full_path.rstrip("?"))
+
+
+def _finish_profile(response):
+    profile = g.pop("_sql_profile", None)
+    if profile is None:
+        return response
+
+    response.headers["Server-Timing"] = profile.server_timing()
+    for sql, count in profile.repeated_statements():
+        print(f"⚠️ Possible N+1 on {profile.method} {profile.path}: {count}x {sql}")
+
+    with _history_lock:
+        _history.append(profile)
+    return response
+
+
+def init_app(app):
+    if not app.config.get("SQL_PROFILING", PROFILING_ENABLED):
+        return
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import quote
+
+# Turn on with TRADEENGINE_READ_SNAPSHOT=1 (or READ_SNAPSHOT in app config)
+READ_SNAPSHOT_ENABLED = os.environ.get("TRADEENGINE_READ_SNAPSHOT", "0") == "1"
+# How often the snapshot copy is rebuilt from the live database
+SNAPSHOT_REFRESH_SECONDS = int(os.environ.get("TRADEENGINE_SNAPSHOT_REFRESH", 60))
+
+
+class SnapshotRefresher:
+    """
+    Keeps a periodically refreshed copy of the database for reporting reads.
+
+    The copy is written with the online backup API into a temp file and then
+    atomically renamed over the previous snapshot. Connections already open on
+    the old file keep reading it, so the snapshot is never modified in place
+    and can be opened with immutable=1 (no locks at all).
+    """
+
+    def __init__(self, source_factory, snapshot_path, refresh_seconds=SNAPSHOT_REFRESH_SECONDS, on_refresh=None):
+        self._source_factory = source_factory
+        self.snapshot_path = snapshot_path
+        self.refresh_seconds = refresh_seconds
+        # Called after each swap so pooled connections on the old file get recycled
+        self.on_refresh = on_refresh
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._thread = None
+        self.stats = {
+            "refreshes": 0,
+            "errors": 0,
+            "last_refresh_at": None,
+            "last_duration_ms": 0.0,
+        }
+
+    def ensure_started(self):
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._reset()
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sqlite-snapshot", daemon=True)
+                self._thread.start()
+
+    def is_available(self):
+        return os.path.exists(self.snapshot_path)
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"❌ Read snapshot refresh failed: {e}")
+            time.sleep(self.refresh_seconds)
+
+    def refresh(self):
+        started = time.perf_counter()
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        source = self._source_factory()
+        target = sqlite3.connect(tmp_path)
+        try:
+            source.backup(target)
+            # A snapshot has no writers, so a rollback journal is all it needs
+            target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            target.close()
+            source.close()
+        os.replace(tmp_path, self.snapshot_path)
+        if self.on_refresh:
+            self.on_refresh()
+
+        self.stats["refreshes"] += 1
+        self.stats["last_refresh_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.stats["last_duration_ms"] = (time.perf_counter() - started) * 1000
+
+    def open_connection(self):
+        uri = f"file:{quote(self.snapshot_path)}?mode=ro&immutable=1"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get_stats(self):
+        data = dict(self.stats)
+        data["path"] = self.snapshot_path
+        data["available"] = self.is_available()
+        return data
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+
+# Pick with TRADEENGINE_STORAGE_PROFILE (or STORAGE_PROFILE in app config)
+STORAGE_PROFILE = os.environ.get("TRADEENGINE_STORAGE_PROFILE", "default")
+
+# ============================================
+# Profiles
+# ============================================
+# "default" keeps SQLite's rollback journal. "wal" lets readers and the
+# writer run concurrently; synchronous=NORMAL is durable across application
+# crashes and only fsyncs the WAL at checkpoints.
+STORAGE_PROFILES = {
+    "default": {},
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -20000,        # ~20 MB page cache per connection
+        "mmap_size": 268435456,      # 256 MB memory-mapped reads
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1000,  # pages
+    },
+}
+
+# Checkpoint manager settings (only used by WAL profiles)
+CHECKPOINT_INTERVAL = 30                    # seconds between WAL size checks
+CHECKPOINT_PASSIVE_BYTES = 4 * 1024 * 1024  # WAL size that triggers a PASSIVE checkpoint
+CHECKPOINT_TRUNCATE_BYTES = 64 * 1024 * 1024  # WAL size that forces a TRUNCATE checkpoint
+
+
+def get_profile(name):
+    if name not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile: {name}")
+    return STORAGE_PROFILES[name]
+
+
+# Pragmas that change the database file itself; read-only connections skip them
+WRITER_PRAGMAS = ("journal_mode", "wal_autocheckpoint")
+
+
+def apply_profile(conn, name, read_only=False):
+    # journal_mode must come first: it cannot change inside a transaction
+    for pragma, value in get_profile(name).items():
+        if read_only and pragma in WRITER_PRAGMAS:
+            continue
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+
+def uses_wal(name):
+    return str(get_profile(name).get("journal_mode", "")).upper() == "WAL"
+
+
+# ============================================
+# Checkpoint Manager
+# ============================================
+class CheckpointManager:
+    """
+    Background thread that keeps the WAL file bounded.
+    Auto-checkpoints stop short whenever a reader is active, so under steady
+    read traffic the WAL can keep growing; this runs PASSIVE checkpoints once it
+    passes a soft limit and a TRUNCATE checkpoint past the hard limit.
+    """
+
+    def __init__(self, factory, db_path, interval=CHECKPOINT_INTERVAL,
+                 passive_bytes=CHECKPOINT_PASSIVE_BYTES, truncate_bytes=CHECKPOINT_TRUNCATE_BYTES):
+        self._factory = factory
+        self.wal_path = db_path + "-wal"
+        self.interval = interval
+        self.passive_bytes = passive_bytes
+        self.truncate_bytes = truncate_bytes
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._thread = None
+        self._stop = threading.Event()
+        self.stats = {
+            "checkpoints": 0,
+            "truncations": 0,
+            "busy": 0,
+            "last_mode": None,
+            "last_log_frames": 0,
+            "last_checkpointed_frames": 0,
+            "last_duration_ms": 0.0,
+            "last_run_at": None,
+            "errors": 0,
+        }
+
+    def ensure_started(self):
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._reset()
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sqlite-checkpoint", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def wal_size(self):
+        try:
+            return os.path.getsize(self.wal_path)
+        except OSError:
+            return 0
+
+    def _run(self):
+        conn = None
+        while not self._stop.wait(self.interval):
+            try:
+                if conn is None:
+                    conn = self._factory()
+                self.maybe_checkpoint(conn)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"❌ WAL checkpoint failed: {e}")
+
+    def maybe_checkpoint(self, conn):
+        size = self.wal_size()
+        if size >= self.truncate_bytes:
+            return self.checkpoint(conn, "TRUNCATE")
+        if size >= self.passive_bytes:
+            return self.checkpoint(conn, "PASSIVE")
+        return None
+
+    def checkpoint(self, conn, mode="PASSIVE"):
+        started = time.perf_counter()
+        busy, log_frames, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+
+        self.stats["checkpoints"] += 1
+        if mode == "TRUNCATE" and not busy:
+            self.stats["truncations"] += 1
+        if busy:
+            self.stats["busy"] += 1
+        self.stats["last_mode"] = mode
+        self.stats["last_log_frames"] = log_frames
+        self.stats["last_checkpointed_frames"] = checkpointed
+        self.stats["last_duration_ms"] = (time.perf_counter() - started) * 1000
+        self.stats["last_run_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        return busy, log_frames, checkpointed
+
+    def get_stats(self):
+        data = dict(self.stats)
+        data["wal_size_bytes"] = self.wal_size()
+        return data
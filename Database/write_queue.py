@@ -0,0 +1,141 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+# Turn on with TRADEENGINE_WRITE_QUEUE=1 (or WRITE_QUEUE in app config)
+WRITE_QUEUE_ENABLED = os.environ.get("TRADEENGINE_WRITE_QUEUE", "0") == "1"
+# Upper bound on jobs folded into one transaction / fsync
+MAX_BATCH_SIZE = 64
+
+
+class WriteQueue:
+    """
+    Funnels write jobs through one long-lived writer thread.
+
+    A job is a callable taking a connection. It runs inside its own SAVEPOINT,
+    so a failing job is rolled back without touching its neighbours, and every
+    job drained from the queue in one go shares a single COMMIT (group commit).
+    Jobs must not commit or roll back themselves.
+    """
+
+    def __init__(self, factory, max_batch_size=MAX_BATCH_SIZE):
+        self._factory = factory
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._queue = queue.Queue()
+        self._thread = None
+        self.stats = {
+            "jobs": 0,
+            "failed_jobs": 0,
+            "batches": 0,
+            "largest_batch": 0,
+            "commit_failures": 0,
+            "writer_failures": 0,
+            "last_error": None,
+        }
+
+    def submit(self, job):
+        if self._pid != os.getpid():
+            # Forked child: the parent's writer thread does not exist here.
+            self._lock = threading.Lock()
+            self._reset()
+        future = Future()
+        # Under the lock: a failing writer drains the queue under it too, so a
+        # job is never left waiting on a thread that is already gone.
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((job, future))
+        return future
+
+    def get_stats(self):
+        data = dict(self.stats)
+        data["pending"] = self._queue.qsize()
+        data["running"] = self._thread is not None
+        return data
+
+    def _run(self):
+        conn = None
+        try:
+            conn = self._factory()
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.max_batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    self._execute_batch(conn, batch)
+                except Exception:
+                    for job, future in batch:
+                        if not future.done():
+                            future.set_exception(RuntimeError("Write job lost: the writer thread failed"))
+                    raise
+        except Exception as e:
+            # Cannot open the database (locked, missing, read-only) or the writer
+            # broke: fail whatever is waiting and let the next submit start afresh.
+            print(f"❌ Writer thread stopped: {e}")
+            self._stop(e)
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    def _stop(self, error):
+        with self._lock:
+            self._thread = None
+            self.stats["writer_failures"] += 1
+            self.stats["last_error"] = str(error)
+            while True:
+                try:
+                    job, future = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(error)
+
+    def _execute_batch(self, conn, batch):
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for job, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    result = job(conn)
+                    conn.execute("RELEASE write_job")
+                    outcomes.append((future, result, None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_job")
+                    conn.execute("RELEASE write_job")
+                    outcomes.append((future, None, e))
+            conn.commit()
+        except Exception as e:
+            # The whole batch is lost: nothing was committed.
+            if conn.in_transaction:
+                conn.rollback()
+            self.stats["commit_failures"] += 1
+            for job, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        for future, result, error in outcomes:
+            self.stats["jobs"] += 1
+            if error is not None:
+                self.stats["failed_jobs"] += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
@@ -1,67 +1,140 @@
-from flask import Flask
-from Database.db_manager import init_schema
-from routes.auth_routes import auth_bp
-from routes.product_route import shop_bp
-from routes.admin_routes import admin_bp
-from routes.cart_routes import cart_bp
-from routes.wishlist_routes import wishlist_bp
-from routes.review_routes import review_bp
-from routes.checkout_routes import checkout_bp
-from routes.html_checkout_routes import html_checkout_bp
+import importlib
+import os
+import time
+from contextlib import contextmanager
 
+from flask import Flask, render_template, session, redirect, url_for, flash
 
-app = Flask(__name__)
 
-app.secret_key = "TradeEngine_Secret_Key_2025" 
+# (module, blueprint attribute, url_prefix) - imported when an app is built,
+# so importing this module stays cheap (gunicorn master, CLI tools, scripts)
+BLUEPRINTS = (
+    ("routes.auth_routes", "auth_bp", None),
+    ("routes.product_route", "shop_bp", None),
+    ("routes.admin_routes", "admin_bp", None),
+    ("routes.cart_routes", "cart_bp", None),
+    ("routes.wishlist_routes", "wishlist_bp", None),
+    ("routes.review_routes", "review_bp", None),
+    ("routes.checkout_routes", "checkout_bp", "/api"),
+    ("routes.html_checkout_routes", "html_checkout_bp", None),
+)
 
+DEFAULT_CONFIG = {
+    "SECRET_KEY": "TradeEngine_Secret_Key_2025",
+    # Apply pending schema migrations while building the app
+    "MIGRATE_ON_START": os.environ.get("TRADEENGINE_MIGRATE_ON_START", "1") == "1",
+    # Print where boot time goes (imports, DB init, blueprints)
+    "BOOT_TIMING": os.environ.get("TRADEENGINE_BOOT_TIMING", "0") == "1",
+}
 
-init_schema()
 
+# ============================================================
+# Boot Timing
+# ============================================================
+class BootTimer:
+    """Collects (step, ms) pairs while the app is built; report() prints them."""
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.steps = []
+
+    @contextmanager
+    def step(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, (time.perf_counter() - started) * 1000))
+
+    def report(self):
+        if not self.enabled:
+            return
+        total_ms = (time.perf_counter() - self.started) * 1000
+        print(f"⏱️  App boot took {total_ms:.1f} ms (pid {os.getpid()})")
+        for name, ms in sorted(self.steps, key=lambda s: s[1], reverse=True):
+            print(f"    {ms:8.1f} ms  {name}")
+
+
+# ============================================================
+# App Factory
+# ============================================================
+def create_app(config=None):
+    """
+    Builds a configured TradeEngine app.
+
+    config may be a mapping or a config object; it is applied over
+    DEFAULT_CONFIG. Nothing runs at import time: blueprints and repositories
+    are imported here, and database connections are only opened by
+    migrations (MIGRATE_ON_START) or requests. Pools, the write queue and the
+    background threads are fork-safe, so the app can be built once in the
+    gunicorn master (preload_app) and shared by every worker.
+    """
+    app = Flask(__name__)
+    app.config.from_mapping(DEFAULT_CONFIG)
+    if isinstance(config, dict):
+        app.config.from_mapping(config)
+    elif config is not None:
+        app.config.from_object(config)
+
+    timer = BootTimer(app.config["BOOT_TIMING"])
+
+    with timer.step("import Database.db_manager"):
+        from Database.db_manager import init_schema, init_app
+    with timer.step("db_manager.init_app"):
+        init_app(app)
+    if app.config["MIGRATE_ON_START"]:
+        with timer.step("init_schema"):
+            init_schema()
+
+    for module_name, attr, url_prefix in BLUEPRINTS:
+        with timer.step(f"import {module_name}"):
+            blueprint = getattr(importlib.import_module(module_name), attr)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
+
+    with timer.step("login manager"):
+        _init_login_manager(app)
+
+    app.add_url_rule('/checkout', 'checkout_page', checkout_page)
+
+    timer.report()
+    return app
 
-app.register_blueprint(auth_bp)
-app.register_blueprint(shop_bp)
-app.register_blueprint(admin_bp)
-app.register_blueprint(cart_bp)
-app.register_blueprint(wishlist_bp)
-app.register_blueprint(review_bp)
-app.register_blueprint(checkout_bp, url_prefix='/api')
-app.register_blueprint(html_checkout_bp)
 
 # ============================================================
 # FLASK LOGIN SETUP (Minimal Fix for Crash)
 # ============================================================
-from flask_login import LoginManager
-from Database.Repositories.user_repo import UserRepository
+def _init_login_manager(app):
+    from flask_login import LoginManager
 
-login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'auth.login'
+    login_manager = LoginManager()
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
 
-@login_manager.user_loader
-def load_user(user_id):
-    """Reload user object from user_id stored in session"""
-    return UserRepository.get_user_by_id(int(user_id))
+    @login_manager.user_loader
+    def load_user(user_id):
+        """Reload user object from user_id stored in session"""
+        from Database.Repositories.user_repo import UserRepository
+        return UserRepository.get_user_by_id(int(user_id))
 
 
-@app.route('/checkout')
 def checkout_page():
     """Serve the dynamic HTML checkout page"""
-    from flask import render_template, session, redirect, url_for, flash
     from Database.Repositories.cart_repo import CartRepository
     from Database.Repositories.user_repo import UserRepository
-    
+
     try:
         if 'user_id' not in session:
             flash("Please login to proceed to checkout.", "error")
             return redirect(url_for('auth.login'))
-            
+
         user_id = session['user_id']
         user_obj = UserRepository.get_user_by_id(user_id)
         cart = CartRepository.get_cart_by_user(user_obj)
-        
+
         items = []
         total = 0
-        
+
         if cart and not cart.is_empty:
             total = cart.subtotal
             # Convert ShoppingCart items to dicts expected by template
@@ -74,12 +147,22 @@ def checkout_page():
                 }
                 for item in cart.items
             ]
-            
+
         return render_template('checkout.html', items=items, total=total)
     except Exception as e:
         return f"Error loading checkout: {str(e)}", 500
 
 
+def __getattr__(name):
+    # `app:app` (gunicorn, flask run, older scripts) still works: the default
+    # app is built on first access instead of at import time.
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == '__main__':
     print("🚀 TradeEngine is running on http://127.0.0.1:5000")
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    create_app().run(debug=True, port=5000)
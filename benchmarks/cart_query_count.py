@@ -0,0 +1,79 @@
+"""
+Query count for loading a cart, by cart size.
+
+    python benchmarks/cart_query_count.py [sizes...]
+
+Builds a fresh database in a temp directory, fills one customer's cart
+with 1, 10, 50 and 200 lines (or the sizes given) and requests /cart
+for each with SQL profiling on. The number of statements per request
+must not depend on the cart size; the script exits with status 1 if it
+does, so it doubles as a regression check.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Must be set before the app (and db_manager) is imported
+os.environ["TRADEENGINE_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+from app import create_app
+
+
+def fill_cart(db_path, user_id, size):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
+        missing = size - conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO products (name, price, category, stock_quantity, details) VALUES (?, ?, ?, ?, ?)",
+            ((f"Bench Machine {i}", 100.0 + i, "Bench", 50, "{}") for i in range(max(missing, 0)))
+        )
+        conn.execute(
+            "INSERT INTO cart_items (user_id, product_id, quantity) "
+            "SELECT ?, id, 1 FROM products ORDER BY id LIMIT ?", (user_id, size)
+        )
+    conn.close()
+
+
+def main(sizes):
+    app = create_app({"SQL_PROFILING": True})
+    db_path = os.environ["TRADEENGINE_DB_PATH"]
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        user_id = conn.execute(
+            "INSERT INTO users (username, email, password_hash) VALUES ('bench', 'bench@example.com', 'x')"
+        ).lastrowid
+    conn.close()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=user_id, username="bench", role="customer")
+
+    counts = []
+    print(f"{'lines':>6} {'queries':>8} {'ms':>8}")
+    for size in sizes:
+        fill_cart(db_path, user_id, size)
+        client.get("/cart")  # warm the pools
+        started = time.perf_counter()
+        response = client.get("/cart")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        queries = response.headers["Server-Timing"].split('desc="')[1].split(" ")[0]
+        counts.append(int(queries))
+        print(f"{size:>6} {queries:>8} {elapsed_ms:>8.1f}")
+
+    if len(set(counts)) != 1:
+        print("❌ Query count grows with the cart size")
+        return 1
+    print(f"✅ {counts[0]} queries per /cart at every size")
+    return 0
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1, 10, 50, 200]
+    sys.exit(main(sizes))
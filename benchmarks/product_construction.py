@@ -0,0 +1,139 @@
+"""
+Product construction cost for large listings.
+
+    python benchmarks/product_construction.py [rows]
+
+Builds an in-memory products table (100k rows by default) and times
+turning its rows into product objects four ways:
+
+  before      the original Product (per-instance __dict__, details parsed in
+              __init__), as _map_row_to_object built it for every row
+  validated   today's Product(...) through the checking setters
+  from_row    Product.from_row(row), details left unparsed
+  from_row+d  Product.from_row(row), then details read (a page that uses them)
+
+Memory is the traced allocation for the whole list of objects.
+"""
+import json
+import os
+import sqlite3
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.product_model import Product
+
+
+def build_rows(count):
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("""
+        CREATE TABLE products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, price REAL NOT NULL,
+            image_url TEXT, category TEXT NOT NULL, stock_quantity INTEGER DEFAULT 0,
+            details TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    details = json.dumps({"brand": "Bosch", "power": "1500W", "weight": "4.2kg", "warranty": "2 years"})
+    conn.executemany(
+        "INSERT INTO products (name, price, image_url, category, stock_quantity, details) VALUES (?, ?, ?, ?, ?, ?)",
+        ((f"Machine {i}", 100.0 + i % 900, f"/img/{i}.jpg", f"Category {i % 12}", i % 40, details)
+         for i in range(count))
+    )
+    return conn.execute("SELECT * FROM products").fetchall()
+
+
+class LegacyProduct:
+    # Baseline: models/product_model.py before __slots__ / from_row / lazy details
+    def __init__(self, id, name, price, image_url, category, stock_quantity, details, created_at=None):
+        self.id = id
+        self.name = name
+        self.image_url = image_url
+        self.category = category
+        self.created_at = created_at
+        self.price = price
+        self.stock_quantity = stock_quantity
+
+        if isinstance(details, str) and details.strip():
+            try:
+                self.details = json.loads(details)
+            except json.JSONDecodeError:
+                self.details = {}
+        elif isinstance(details, dict):
+            self.details = details
+        else:
+            self.details = {}
+
+    @property
+    def price(self):
+        return self._price
+
+    @price.setter
+    def price(self, value):
+        try:
+            val = float(value)
+            if val < 0:
+                raise ValueError("Price cannot be negative.")
+            self._price = val
+        except ValueError:
+            raise ValueError("Price must be a valid number.")
+
+    @property
+    def stock_quantity(self):
+        return self._stock_quantity
+
+    @stock_quantity.setter
+    def stock_quantity(self, value):
+        try:
+            val = int(value)
+            if val < 0:
+                raise ValueError("Stock quantity cannot be negative.")
+            self._stock_quantity = val
+        except ValueError:
+            raise ValueError("Stock quantity must be an integer.")
+
+
+def before(row):
+    return LegacyProduct(row['id'], row['name'], row['price'], row['image_url'], row['category'],
+                         row['stock_quantity'], row['details'], row['created_at'])
+
+
+def validated(row):
+    return Product(row['id'], row['name'], row['price'], row['image_url'], row['category'],
+                   row['stock_quantity'], json.loads(row['details']), row['created_at'])
+
+
+def from_row_with_details(row):
+    product = Product.from_row(row)
+    product.details
+    return product
+
+
+def measure(label, build, rows, repeat=3):
+    best = min(_timed(build, rows) for _ in range(repeat))
+
+    tracemalloc.start()
+    products = [build(row) for row in rows]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del products
+
+    print(f"{label:<12} {best * 1000:>9.1f} ms  {best / len(rows) * 1e6:>6.2f} µs/row  {size / 1024 / 1024:>7.1f} MiB")
+
+
+def _timed(build, rows):
+    started = time.perf_counter()
+    [build(row) for row in rows]
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = build_rows(count)
+    print(f"{count:,} rows")
+    measure("before", before, rows)
+    measure("validated", validated, rows)
+    measure("from_row", Product.from_row, rows)
+    measure("from_row+d", from_row_with_details, rows)
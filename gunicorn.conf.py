@@ -0,0 +1,20 @@
+# Gunicorn settings for TradeEngine:  gunicorn -c gunicorn.conf.py
+import os
+
+# The app is built once in the master (imports + migrations) and forked into
+# the workers, so a new or recycled worker is serving requests almost at once.
+# Connection pools, the write queue and background threads reset after fork.
+wsgi_app = "app:create_app()"
+preload_app = True
+
+bind = os.environ.get("TRADEENGINE_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("TRADEENGINE_THREADS", 4))
+
+# Recycle workers periodically; with preload this costs a fork, not a boot
+max_requests = int(os.environ.get("TRADEENGINE_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s forked from preloaded app", worker.pid)
@@ -4,6 +4,9 @@ class CartItem:
         self._item_id = item_id
         self._user = user
         self._product = product
+        # The ShoppingCart holding this line (set by ShoppingCart._add_item), told of every quantity change
+        self._cart = None
+        self._quantity = 0
         self.quantity = quantity
 
     @property
@@ -18,7 +21,9 @@ class CartItem:
     def quantity(self, value):
         if not isinstance(value, int) or value < 1:
             raise ValueError("Quantity must be an integer and at least 1")
-        self._quantity = value
+        old_quantity, self._quantity = self._quantity, value
+        if self._cart is not None:
+            self._cart._quantity_changed(self, old_quantity, value)
 
     def increase(self):
         self.quantity += 1
@@ -33,7 +38,7 @@ class CartItem:
     def to_dict(self):
         return {
             "item_id": self._item_id,
-            "user_id": self._user.id,
+            "user_id": self._user.id if self._user else None,
             "product_name": self._product.name,
             "quantity": self.quantity,
             "item_total_price": self.item_total_price
@@ -1,6 +1,10 @@
 import json
 
 class Product:
+    # No per-instance __dict__: listings hold thousands of these (and the catalog cache keeps them)
+    __slots__ = ("id", "name", "image_url", "category", "created_at",
+                 "_price", "_stock_quantity", "_details", "_raw_details")
+
     def __init__(self, id, name, price, image_url, category, stock_quantity, details, created_at=None):
         self.id = id
         self.name = name
@@ -12,16 +16,24 @@ class Product:
         self.price = price 
         self.stock_quantity = stock_quantity
         
-       
-        if isinstance(details, str) and details.strip():
-            try:
-                self.details = json.loads(details)
-            except json.JSONDecodeError:
-                self.details = {}
-        elif isinstance(details, dict):
-            self.details = details
-        else:
-            self.details = {}
+        # JSON string or dict; a string is parsed on first access
+        self.details = details
+
+    @classmethod
+    def from_row(cls, row):
+        # Trusted fast path for rows read from the products table: the schema
+        # already guarantees the types, so the validating setters are skipped.
+        product = cls.__new__(cls)
+        product.id = row['id']
+        product.name = row['name']
+        product.image_url = row['image_url']
+        product.category = row['category']
+        product.created_at = row['created_at']
+        product._price = row['price']
+        product._stock_quantity = row['stock_quantity'] or 0
+        product._details = None
+        product._raw_details = row['details']
+        return product
 
     # ==========================
     # Properties & Validation
@@ -55,6 +67,31 @@ class Product:
         except ValueError:
             raise ValueError("Stock quantity must be an integer.")
 
+    @property
+    def details(self):
+        # The raw string is kept: a cached product may be parsed by two threads at once
+        details = self._details
+        if details is None:
+            details = self._details = self._parse_details(self._raw_details)
+        return details
+
+    @details.setter
+    def details(self, value):
+        if isinstance(value, dict):
+            self._details, self._raw_details = value, None
+        else:
+            self._details, self._raw_details = None, value
+
+    @staticmethod
+    def _parse_details(raw):
+        if isinstance(raw, str) and raw.strip():
+            try:
+                details = json.loads(raw)
+            except json.JSONDecodeError:
+                return {}
+            return details if isinstance(details, dict) else {}
+        return {}
+
     # ==========================
     # Logic Methods
     # ==========================
@@ -71,6 +108,12 @@ class Product:
     def get_display_price(self):
         return f"${self._price:,.2f}"
 
+    def fingerprint(self):
+        # Every field a rendering can show: equal fingerprints render the same
+        details = self._raw_details if self._details is None else json.dumps(self._details, sort_keys=True)
+        return (self.id, self.name, self._price, self.image_url, self.category,
+                self._stock_quantity, details, self.created_at)
+
     # ==========================
     #  Serialization 
     # ==========================
@@ -3,7 +3,14 @@ from .cart_item import CartItem
 class ShoppingCart:
     def __init__(self, user):
         self._user = user
-        self._items = []
+        # product id -> CartItem (dicts keep insertion order, so items stay in cart order)
+        self._items = {}
+        # Running totals, kept in step with every quantity change (see CartItem.quantity).
+        # Money in integer cents, so adding and removing lines never drifts.
+        self._total_quantity = 0
+        self._subtotal_cents = 0
+        # product id -> unit price in cents when the line joined (what its total was counted at)
+        self._unit_cents = {}
 
     @property
     def user(self):
@@ -11,7 +18,7 @@ class ShoppingCart:
 
     @property
     def items(self):
-        return list(self._items)
+        return list(self._items.values())
 
     @property
     def is_empty(self):
@@ -23,17 +30,45 @@ class ShoppingCart:
 
     @property
     def total_quantity(self):
-        total = 0
-        for item in self._items:
-            total += item.quantity
-        return total
+        return self._total_quantity
 
     @property
     def subtotal(self):
-        total = 0
-        for item in self._items:
-            total += item.item_total_price
-        return total
+        return self._subtotal_cents / 100
+
+    # ==========================
+    # Index & Totals Bookkeeping
+    # ==========================
+
+    def _add_item(self, item):
+        # Used by the repository when loading a cart; a repeated product replaces its line
+        self._discard(item.product.id)
+        unit_cents = round(item.product.price * 100)
+        self._items[item.product.id] = item
+        self._unit_cents[item.product.id] = unit_cents
+        self._total_quantity += item.quantity
+        self._subtotal_cents += unit_cents * item.quantity
+        item._cart = self
+
+    def _quantity_changed(self, item, old_quantity, new_quantity):
+        # Called by CartItem.quantity for lines of this cart, however the change was made
+        delta = new_quantity - old_quantity
+        self._total_quantity += delta
+        self._subtotal_cents += self._unit_cents[item.product.id] * delta
+
+    def _discard(self, product_id):
+        item = self._items.pop(product_id, None)
+        if item is None:
+            return None
+        unit_cents = self._unit_cents.pop(product_id)
+        self._total_quantity -= item.quantity
+        self._subtotal_cents -= unit_cents * item.quantity
+        item._cart = None
+        return item
+
+    # ==========================
+    # Cart Operations
+    # ==========================
 
     def _check_stock_availability(self, product, requested_quantity):
         if not product.is_in_stock():
@@ -45,10 +80,7 @@ class ShoppingCart:
         return True, "Stock available."
 
     def get_item_by_product(self, product):
-        for item in self._items:
-            if item.product.id == product.id:
-                return item
-        return None
+        return self._items.get(product.id)
 
     def add_product(self, product, quantity=1):
         item = self.get_item_by_product(product)
@@ -58,10 +90,9 @@ class ShoppingCart:
             return False, message
 
         if item:
-            item.quantity += quantity
+            item.quantity = requested_total
         else:
-            new_item = CartItem(None, self._user, product, quantity) 
-            self._items.append(new_item)
+            self._add_item(CartItem(None, self._user, product, quantity))
         return True, "Product added to cart."
 
     def update_quantity(self, product, new_quantity):
@@ -91,23 +122,24 @@ class ShoppingCart:
         return True, "Cart updated."
     
     def remove_product(self, product):
-        item = self.get_item_by_product(product)
-        if not item:
+        if self._discard(product.id) is None:
             return False, "Item not found."
-
-        self._items.remove(item)
         return True, "Item removed from cart."
 
     def clear_cart(self):
-        self._items = []
+        for item in self._items.values():
+            item._cart = None
+        self._items = {}
+        self._unit_cents = {}
+        self._total_quantity, self._subtotal_cents = 0, 0
 
     def to_dict(self):
         items_list = []
-        for item in self._items:
+        for item in self._items.values():
             items_list.append(item.to_dict())
 
         return {
-            "user": self._user.username,
+            "user": self._user.username if self._user else None,
             "items": items_list,
             "items_count": self.items_count,
             "total_quantity": self.total_quantity,
@@ -115,4 +147,5 @@ class ShoppingCart:
         }
     
     def __repr__(self):
-        return f"<ShoppingCart of {self._user.username}: {self.items_count} items, Subtotal: ${self.subtotal:,.2f}>"
\ No newline at end of file
+        owner = self._user.username if self._user else "guest"
+        return f"<ShoppingCart of {owner}: {self.items_count} items, Subtotal: ${self.subtotal:,.2f}>"
@@ -3,7 +3,8 @@ from .wishlist_item import WishlistItem
 class Wishlist:
     def __init__(self, user):
         self._user = user
-        self._items = []
+        # product id -> WishlistItem (insertion order kept)
+        self._items = {}
 
     @property
     def user(self):
@@ -11,7 +12,7 @@ class Wishlist:
 
     @property
     def items(self):
-        return list(self._items)
+        return list(self._items.values())
 
     @property
     def items_count(self):
@@ -21,26 +22,24 @@ class Wishlist:
     def is_empty(self):
         return len(self._items) == 0
 
+    def _add_item(self, item):
+        # Used by the repository when loading a wishlist
+        self._items[item.product.id] = item
+
     def is_product_in_wishlist(self, product):
-        for item in self._items:
-            if item.product.id == product.id:
-                return True
-        return False
+        return product.id in self._items
 
     def add_product(self, product):
         if self.is_product_in_wishlist(product):
             return False, f"{product.name} is already in your wishlist."
         
-        new_item = WishlistItem(None, self._user, product)
-        self._items.append(new_item)
+        self._add_item(WishlistItem(None, self._user, product))
         return True, f"{product.name} added to wishlist successfully."
 
     def remove_product(self, product):
-        for item in self._items:
-            if item.product.id == product.id:
-                self._items.remove(item)
-                return True, f"{product.name} removed from wishlist."
-        return False, "Product not found in wishlist."
+        if self._items.pop(product.id, None) is None:
+            return False, "Product not found in wishlist."
+        return True, f"{product.name} removed from wishlist."
 
     def move_to_cart(self, product, shopping_cart):
         if not self.is_product_in_wishlist(product):
@@ -55,7 +54,7 @@ class Wishlist:
 
     def move_all_to_cart(self, shopping_cart):
         results = []
-        for item in list(self._items):
+        for item in list(self._items.values()):
             success, message = self.move_to_cart(item.product, shopping_cart)
             results.append({
                 "product_id": item.product.id,
@@ -65,13 +64,13 @@ class Wishlist:
         return results
 
     def clear_wishlist(self):
-        self._items = []
+        self._items = {}
         return True, "Wishlist cleared successfully."
 
     def to_dict(self):
         return {
             "user": self._user.username,
-            "items": [item.to_dict() for item in self._items],
+            "items": [item.to_dict() for item in self._items.values()],
             "items_count": self.items_count
         }
 
@@ -1,12 +1,33 @@
-from flask import Blueprint, render_template, session, redirect, url_for, flash, request
+from flask import Blueprint, render_template, session, redirect, url_for, flash, request, Response, stream_with_context
 from Database.Repositories.product_repo import ProductRepository
 from models.product_model import Product
 from Database.Repositories.user_repo import UserRepository
 from Database.Repositories.order_repo import OrderRepository
+from Database.db_manager import (
+    get_pool_stats, get_read_pool_stats, get_write_queue_stats, get_storage_stats,
+    get_snapshot_stats, get_async_stats, get_async_pool_stats, get_archive_stats,
+    archive_orders, prefer_snapshot_reads
+)
+from Database import query_profiler
+from Database.catalog_cache import catalog_cache
+from Database import catalog_io
 import json
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+# ==========================================
+# Snapshot Reads (reporting pages)
+# ==========================================
+def _mark_admin_write():
+    # The snapshot can be a minute old: the page the admin lands on next reads live data
+    session['admin_fresh_read'] = True
+
+def _reporting_reads():
+    # Reporting pages read from the snapshot, except right after the admin's own change
+    if not session.pop('admin_fresh_read', False):
+        prefer_snapshot_reads()
+
+
 @admin_bp.route('/dashboard')
 def dashboard():
     if 'user_id' not in session:
@@ -17,13 +38,16 @@ def dashboard():
         flash("Access Denied! Admins only.", "error")
         return redirect(url_for('shop.home'))
 
+    _reporting_reads()
     products = ProductRepository.get_all_products()
     users = UserRepository.get_all_users()
-    orders = OrderRepository.get_all_orders()
+    # Counted from aggregates (hot table + archived months), not by loading every order
+    order_stats = OrderRepository.get_order_stats()
     stats = {
         'products': len(products),
         'users': len(users),
-        'orders': len(orders)
+        'orders': order_stats['orders'],
+        'revenue': order_stats['revenue']
     }
     
     return render_template('admin/dashboard.html', stats=stats)
@@ -38,6 +62,50 @@ def manage_products():
     return render_template('admin/products.html', products=products)
 
 
+@admin_bp.route('/products/import', methods=['GET', 'POST'])
+def import_products():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return redirect(url_for('auth.login'))
+
+    report = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash("Choose a CSV or JSONL file to import.", "error")
+            return redirect(url_for('admin.import_products'))
+
+        fmt = request.form.get('format') or catalog_io.detect_format(upload.filename)
+        try:
+            report = catalog_io.import_catalog(upload.stream, fmt)
+        except Exception as e:
+            print(f"❌ Error importing catalog: {e}")
+            flash("Import failed.", "error")
+            return redirect(url_for('admin.import_products'))
+
+        category = "success" if not report.failed else "info"
+        flash(f"Imported {report.imported} of {report.rows} row(s) in {report.seconds:.1f}s.", category)
+
+    return render_template('admin/import_products.html', report=report,
+                           fields=catalog_io.CATALOG_FIELDS, formats=catalog_io.FORMATS)
+
+
+@admin_bp.route('/products/export')
+def export_products():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return redirect(url_for('auth.login'))
+
+    fmt = request.args.get('format', 'csv')
+    if fmt not in catalog_io.FORMATS:
+        fmt = 'csv'
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    # Streamed batch by batch; the catalog is never held in memory
+    return Response(
+        stream_with_context(catalog_io.export_catalog(fmt)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=catalog.{fmt}'}
+    )
+
+
 @admin_bp.route('/products/delete/<int:product_id>')
 def delete_product(product_id):
     if 'user_id' not in session or session.get('role') != 'admin':
@@ -127,6 +195,7 @@ def manage_users():
     if 'user_id' not in session or session.get('role') != 'admin':
         return redirect(url_for('auth.login'))
         
+    _reporting_reads()
     users = UserRepository.get_all_users()
     return render_template('admin/users.html', users=users)
 
@@ -142,6 +211,7 @@ def delete_user(user_id):
         return redirect(url_for('admin.manage_users'))
 
     if UserRepository.delete_user(user_id):
+        _mark_admin_write()
         flash("User deleted successfully.", "success")
     else:
         flash("Error deleting user.", "error")
@@ -184,7 +254,11 @@ def manage_orders():
     if 'user_id' not in session or session.get('role') != 'admin':
         return redirect(url_for('auth.login'))
         
-    raw_orders = OrderRepository.get_all_orders()
+    _reporting_reads()
+    # Archived months are only attached when the date range reaches them
+    since = request.args.get('since') or None
+    until = request.args.get('until') or None
+    raw_orders = OrderRepository.get_all_orders(since=since, until=until)
     
     orders_data = []
     for row in raw_orders:
@@ -194,10 +268,11 @@ def manage_orders():
             'date': row['created_at'],
             'total': row['total_amount'],
             'payment': row['payment_method'],
-            'status': row['status']
+            'status': row['status'],
+            'archived': row['archived']
         })
 
-    return render_template('admin/orders.html', orders=orders_data)
+    return render_template('admin/orders.html', orders=orders_data, since=since or '', until=until or '')
 
 
 
@@ -209,8 +284,54 @@ def update_order_status(order_id):
     new_status = request.form.get('status')
     
     if OrderRepository.update_order_status(order_id, new_status):
+        _mark_admin_write()
         flash(f"Order #{order_id} status updated to {new_status}.", "success")
     else:
         flash("Failed to update status.", "error")
         
     return redirect(url_for('admin.manage_orders'))
+
+
+@admin_bp.route('/orders/archive', methods=['POST'])
+def archive_closed_orders():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return redirect(url_for('auth.login'))
+
+    try:
+        moved = archive_orders()
+    except Exception as e:
+        print(f"❌ Error archiving orders: {e}")
+        flash("Failed to archive orders.", "error")
+        return redirect(url_for('admin.manage_orders'))
+
+    if moved:
+        _mark_admin_write()
+        flash(f"Archived {sum(moved.values())} closed order(s) from {len(moved)} month(s).", "success")
+    else:
+        flash("No closed orders old enough to archive.", "info")
+    return redirect(url_for('admin.manage_orders'))
+
+
+@admin_bp.route('/debug/sql')
+def sql_debug():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return redirect(url_for('auth.login'))
+
+    profiles = [p for p in query_profiler.get_recent_profiles() if not p.path.startswith('/admin/debug')]
+    stat_sections = [
+        ("Connection Pool", get_pool_stats()),
+        ("Read Pool", get_read_pool_stats()),
+        ("Storage", get_storage_stats()),
+        ("Write Queue", get_write_queue_stats()),
+        ("Read Snapshot", get_snapshot_stats()),
+        ("Async Executor", get_async_stats()),
+        ("Async Read Pool", get_async_pool_stats()),
+        ("Order Archive", get_archive_stats()),
+        ("Catalog Cache", catalog_cache.get_stats()),
+    ]
+    return render_template(
+        'admin/sql_debug.html',
+        profiles=profiles,
+        stat_sections=[(title, stats) for title, stats in stat_sections if stats],
+        profiling_enabled=query_profiler.current_profile() is not None
+    )
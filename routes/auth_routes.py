@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from Database.Repositories.user_repo import UserRepository
+from Database.Repositories.cart_repo import CartRepository
 from models.user_model import Customer, User
 
 auth_bp = Blueprint('auth', __name__)
@@ -49,6 +50,11 @@ def login():
             session['user_id'] = user.id
             session['username'] = user.username
             session['role'] = user.role
+
+            # Anything added before logging in joins the account's cart
+            guest_token = session.pop('cart_token', None)
+            if guest_token:
+                CartRepository.merge_guest_cart(guest_token, user.id)
             
             flash(f"Welcome back, {user.username}!", "success")
             
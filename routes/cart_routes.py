@@ -1,14 +1,58 @@
-from flask import Blueprint, render_template, session, request, redirect, url_for, flash
-from Database.Repositories.cart_repo import CartRepository
+import os
+import secrets
+import threading
+import time
+from flask import Blueprint, render_template, session, request, redirect, url_for, flash, jsonify
+from Database.Repositories.cart_repo import CartRepository, BATCH_OPS
 from Database.Repositories.user_repo import UserRepository
+from models.shopping_cart import ShoppingCart
 
 cart_bp = Blueprint('cart', __name__)
 
+# Upper bound on operations in one /cart/batch request
+MAX_BATCH_OPS = 200
+# Expired guest carts are pruned at most this often per process (a table-wide DELETE)
+GUEST_CART_PRUNE_SECONDS = int(os.environ.get("TRADEENGINE_GUEST_CART_PRUNE_SECONDS", 600))
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+# ==========================================
+# Guest Cart Token (the only cart state in the session cookie)
+# ==========================================
+def _prune_guest_carts_if_due():
+    # Throttled: one request every GUEST_CART_PRUNE_SECONDS pays for expiring
+    # abandoned carts, instead of every new visitor competing with cart writes
+    global _last_prune
+    now = time.monotonic()
+    with _prune_lock:
+        if _last_prune and now - _last_prune < GUEST_CART_PRUNE_SECONDS:
+            return
+        _last_prune = now
+    CartRepository.prune_guest_carts()
+
+def guest_cart_token(create=False):
+    token = session.get('cart_token')
+    if not token and create:
+        token = session['cart_token'] = secrets.token_urlsafe(16)
+        _prune_guest_carts_if_due()
+    return token
+
+@cart_bp.before_app_request
+def drop_legacy_session_cart():
+    # Older versions kept whole products in the cookie; drop them once
+    if 'cart' in session:
+        session.pop('cart', None)
+
+# ==========================================
+# Cart Page
+# ==========================================
 @cart_bp.route('/cart')
 def view_cart():
     if 'user_id' not in session:
-        flash("Please login to view your cart.", "error")
-        return redirect(url_for('auth.login'))
+        token = guest_cart_token()
+        cart = CartRepository.get_guest_cart(token) if token else ShoppingCart(None)
+        return render_template('cart.html', cart=cart)
 
     user_id = session.get('user_id')
     user = UserRepository.get_user_by_id(user_id)
@@ -20,28 +64,35 @@ def view_cart():
 
 @cart_bp.route('/cart/add/<int:product_id>')
 def add_to_cart(product_id):
-    if 'user_id' not in session:
-        flash("Please login to add items to cart.", "error")
-        return redirect(url_for('auth.login'))
+    try:
+        quantity = int(request.args.get('quantity', 1))
+    except ValueError:
+        quantity = 1
 
     user_id = session.get('user_id')
-    quantity = int(request.args.get('quantity', 1))
+    if user_id:
+        new_quantity = CartRepository.add_or_update_item(user_id, product_id, quantity)
+    else:
+        # Anonymous: kept server-side, merged into the account on login
+        new_quantity = CartRepository.add_guest_item(guest_cart_token(create=True), product_id, quantity)
 
-    
-    if CartRepository.add_or_update_item(user_id, product_id, quantity):
-        flash("Product added to cart!", "success")
+    if new_quantity:
+        flash(f"Product added to cart! ({new_quantity} in cart)", "success")
     else:
         flash("Could not add product. Not enough stock available.", "error")
-        
+
     return redirect(request.referrer or url_for('cart.view_cart'))
 
 @cart_bp.route('/cart/remove/<int:product_id>')
 def remove_from_cart(product_id):
     user_id = session.get('user_id')
-    if not user_id:
-        return redirect(url_for('auth.login'))
+    if user_id:
+        removed = CartRepository.remove_item(user_id, product_id)
+    else:
+        token = guest_cart_token()
+        removed = bool(token) and CartRepository.remove_guest_item(token, product_id)
 
-    if CartRepository.remove_item(user_id, product_id):
+    if removed:
         flash("Item removed from cart.", "success")
     else:
         flash("Failed to remove item.", "error")
@@ -50,6 +101,85 @@ def remove_from_cart(product_id):
 @cart_bp.route('/cart/clear')
 def clear_cart():
     user_id = session.get('user_id')
-    if user_id and CartRepository.clear_cart(user_id):
+    if user_id:
+        cleared = CartRepository.clear_cart(user_id)
+    else:
+        token = guest_cart_token()
+        cleared = bool(token) and CartRepository.clear_guest_cart(token)
+
+    if cleared:
         flash("Cart cleared.", "success")
     return redirect(url_for('cart.view_cart'))
+
+# ==========================================
+# Batch Changes (JSON: many operations, one round trip)
+# ==========================================
+def _parse_ops(data):
+    # {"ops": [{"op": "set", "product_id": 3, "quantity": 2}, {"op": "clear"}, ...]}
+    raw_ops = data.get('ops') if isinstance(data, dict) else None
+    if not isinstance(raw_ops, list) or not raw_ops:
+        raise ValueError("Expected a non-empty 'ops' list.")
+    if len(raw_ops) > MAX_BATCH_OPS:
+        raise ValueError(f"At most {MAX_BATCH_OPS} operations per request.")
+
+    ops = []
+    for index, raw in enumerate(raw_ops):
+        op = raw.get('op') if isinstance(raw, dict) else None
+        if op not in BATCH_OPS:
+            raise ValueError(f"ops[{index}]: 'op' must be one of {', '.join(BATCH_OPS)}.")
+        if op == 'clear':
+            ops.append((op, None, None))
+            continue
+
+        product_id = raw.get('product_id')
+        quantity = raw.get('quantity', 1 if op == 'add' else None)
+        if not isinstance(product_id, int) or isinstance(product_id, bool):
+            raise ValueError(f"ops[{index}]: 'product_id' must be an integer.")
+        if op != 'remove':
+            minimum = 1 if op == 'add' else 0
+            if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < minimum:
+                raise ValueError(f"ops[{index}]: 'quantity' must be an integer of at least {minimum}.")
+        ops.append((op, product_id, quantity))
+    return ops
+
+def _cart_json(cart):
+    return {
+        'items': [{
+            'product_id': item.product.id,
+            'name': item.product.name,
+            'price': item.product.price,
+            'quantity': item.quantity,
+            'stock_quantity': item.product.stock_quantity,
+            'item_total_price': item.item_total_price
+        } for item in cart.items],
+        'items_count': cart.items_count,
+        'total_quantity': cart.total_quantity,
+        'subtotal': cart.subtotal
+    }
+
+@cart_bp.route('/cart/batch', methods=['POST'])
+def batch_update():
+    """
+    Applies a list of cart operations (set, add, remove, clear) in one
+    transaction and returns the resulting cart. All or nothing: when a line
+    would exceed stock, nothing changes and the errors come back with a 409.
+    """
+    try:
+        ops = _parse_ops(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    user_id = session.get('user_id')
+    if user_id:
+        user = UserRepository.get_user_by_id(user_id)
+        if not user:
+            return jsonify({'error': 'User not found. Please login again.'}), 401
+        cart, errors = CartRepository.apply_batch(user, ops)
+    else:
+        cart, errors = CartRepository.apply_guest_batch(guest_cart_token(create=True), ops)
+
+    if cart is None:
+        return jsonify({'error': 'Could not update the cart.'}), 500
+    if errors:
+        return jsonify({'error': 'Cart not updated.', 'errors': errors, 'cart': _cart_json(cart)}), 409
+    return jsonify({'cart': _cart_json(cart)})
@@ -6,7 +6,7 @@ from datetime import datetime
 from models.order import Order, ShippingAddress, OrderItem
 from models.payment_processor import PaymentProcessor, CreditCardStrategy, CashOnDeliveryStrategy, PaymentContext
 from Database.Repositories.order_repo import OrderRepository
-from Database.db_manager import get_connection
+from Database.db_manager import run_write
 
 checkout_bp = Blueprint('checkout', __name__)
 
@@ -75,10 +75,9 @@ def create_order():
         return jsonify({'error': str(e)}), 400
     
     # Save order to database
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    try:
+    def save_order(conn):
+        cursor = conn.cursor()
+
         # Insert order with JSON shipping address
         # Corrected column name: total_price -> total_amount to match schema
         cursor.execute("""
@@ -96,14 +95,15 @@ def create_order():
         order_id = cursor.lastrowid
         
         # Insert order items
-        for item in items:
-            cursor.execute("""
-                INSERT INTO order_items (order_id, product_id, quantity, price_at_purchase)
-                VALUES (?, ?, ?, ?)
-            """, (order_id, item.product_id, item.quantity, item.unit_price))
-        
-        conn.commit()
-        
+        cursor.executemany("""
+            INSERT INTO order_items (order_id, product_id, quantity, price_at_purchase)
+            VALUES (?, ?, ?, ?)
+        """, [(order_id, item.product_id, item.quantity, item.unit_price) for item in items])
+        return order_id
+
+    try:
+        order_id = run_write(save_order)
+
         # Create response dictionary from PaymentResult
         payment_response = {
             'success': payment_result.success,
@@ -121,94 +121,69 @@ def create_order():
         }), 201
         
     except Exception as e:
-        conn.rollback()
         return jsonify({'error': f'Database error: {str(e)}'}), 500
-    finally:
-        conn.close()
 
 
 @checkout_bp.route('/orders/<int:order_id>', methods=['GET'])
 def get_order(order_id):
-    """Retrieve an order by ID"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    """Retrieve an order by ID (archived orders included)"""
+    row = OrderRepository.get_order(order_id)
+    if not row:
+        return jsonify({'error': 'Order not found'}), 404
     
-    try:
-        cursor.execute("""
-            SELECT id, user_id, shipping_address, payment_method, total_amount, status, created_at
-            FROM orders WHERE id = ?
-        """, (order_id,))
-        
-        row = cursor.fetchone()
-        if not row:
-            return jsonify({'error': 'Order not found'}), 404
-        
-        # Deserialize shipping address from JSON
+    # Deserialize shipping address from JSON
+    shipping = ShippingAddress.from_json(row['shipping_address'])
+    
+    # Get order items
+    items = [
+        {
+            'product_id': item['product_id'],
+            'quantity': item['quantity'],
+            'unit_price': item['price_at_purchase']
+        }
+        for item in OrderRepository.get_order_items(order_id)
+    ]
+    
+    return jsonify({
+        'order_id': row['id'],
+        'user_id': row['user_id'],
+        'shipping': {
+            'full_name': shipping.full_name,
+            'address_line1': shipping.address_line1,
+            'address_line2': shipping.address_line2,
+            'city': shipping.city,
+            'postal_code': shipping.postal_code,
+            'country': shipping.country,
+            'phone': shipping.phone
+        },
+        'payment_method': row['payment_method'],
+        'total': row['total_amount'],
+        'status': row['status'],
+        'items': items,
+        'created_at': row['created_at'],
+        'archived': bool(row['archived'])
+    }), 200
+
+
+@checkout_bp.route('/orders/user/<int:user_id>', methods=['GET'])
+def get_user_orders(user_id):
+    """Get a user's recent orders (?since=YYYY-MM-DD&until=YYYY-MM-DD also searches archived months)"""
+    rows = OrderRepository.get_user_orders(
+        user_id,
+        since=request.args.get('since'),
+        until=request.args.get('until')
+    )
+    
+    orders = []
+    for row in rows:
         shipping = ShippingAddress.from_json(row['shipping_address'])
-        
-        # Get order items
-        cursor.execute("""
-            SELECT product_id, quantity, price_at_purchase
-            FROM order_items WHERE order_id = ?
-        """, (order_id,))
-        
-        items = [
-            {
-                'product_id': item['product_id'],
-                'quantity': item['quantity'],
-                'unit_price': item['price_at_purchase']
-            }
-            for item in cursor.fetchall()
-        ]
-        
-        return jsonify({
+        orders.append({
             'order_id': row['id'],
-            'user_id': row['user_id'],
-            'shipping': {
-                'full_name': shipping.full_name,
-                'address_line1': shipping.address_line1,
-                'address_line2': shipping.address_line2,
-                'city': shipping.city,
-                'postal_code': shipping.postal_code,
-                'country': shipping.country,
-                'phone': shipping.phone
-            },
+            'shipping_city': shipping.city,
             'payment_method': row['payment_method'],
             'total': row['total_amount'],
             'status': row['status'],
-            'items': items,
             'created_at': row['created_at']
-        }), 200
-        
-    finally:
-        conn.close()
-
-
-@checkout_bp.route('/orders/user/<int:user_id>', methods=['GET'])
-def get_user_orders(user_id):
-    """Get all orders for a user"""
-    conn = get_connection()
-    cursor = conn.cursor()
+        })
     
-    try:
-        cursor.execute("""
-            SELECT id, shipping_address, payment_method, total_amount, status, created_at
-            FROM orders WHERE user_id = ? ORDER BY created_at DESC
-        """, (user_id,))
-        
-        orders = []
-        for row in cursor.fetchall():
-            shipping = ShippingAddress.from_json(row['shipping_address'])
-            orders.append({
-                'order_id': row['id'],
-                'shipping_city': shipping.city,
-                'payment_method': row['payment_method'],
-                'total': row['total_amount'],
-                'status': row['status'],
-                'created_at': row['created_at']
-            })
-        
-        return jsonify({'orders': orders}), 200
-        
-    finally:
-        conn.close()
+    return jsonify({'orders': orders}), 200
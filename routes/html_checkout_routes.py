@@ -3,13 +3,14 @@ from flask import Blueprint, request, render_template_string, session, flash, re
 from datetime import datetime
 from models.order import ShippingAddress, OrderItem
 from models.payment_processor import CreditCardStrategy, CashOnDeliveryStrategy, PaymentContext
-from Database.db_manager import get_connection
+from Database.db_manager import run_write, run_async
 from Database.Repositories import cart_repo, user_repo, product_repo
+from Database.catalog_cache import catalog_cache
 html_checkout_bp = Blueprint('html_checkout', __name__)
 
 
 @html_checkout_bp.route('/submit_checkout', methods=['POST'])
-def submit_checkout():
+async def submit_checkout():
     """Handle HTML form submission for checkout"""
     try:
         # 1. Get current user
@@ -32,8 +33,8 @@ def submit_checkout():
         )
         
         # 3. Get cart items and calculate total using CartRepository
-        user_obj = user_repo.UserRepository.get_user_by_id(user_id)
-        cart = CartRepository.get_cart_by_user(user_obj)
+        user_obj = await user_repo.UserRepository.aget_user_by_id(user_id)
+        cart = await CartRepository.aget_cart_by_user(user_obj)
         
         if not cart or cart.is_empty:
             flash("Your cart is empty. Please add items before checkout.", "error")
@@ -76,13 +77,12 @@ def submit_checkout():
             flash(payment_result.message, "error")
             return redirect(url_for('checkout_page'))
         
-        # 5. Save order (using Repository with Shared Transaction)
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            from Database.Repositories.order_repo import OrderRepository
-            
+        # 5. Save order (one write transaction: any failure rolls everything back)
+        from Database.Repositories.order_repo import OrderRepository
+
+        def place_order(conn):
+            cursor = conn.cursor()
+
             # Create Order (OrderRepo now handles order & items)
             order_id = OrderRepository.create_order(
                 user_id=user_id,
@@ -99,30 +99,24 @@ def submit_checkout():
                 
             # 6. Reduce inventory stock (using same cursor)
             for item in items:
-               success = product_repo.ProductRepository.reduce_stock(
+                success = product_repo.ProductRepository.reduce_stock(
                     item.product_id,
                     item.quantity,
                     cursor=cursor
                 )
-               if not success:
+                if not success:
                     raise Exception(
                         f"Not enough stock for product ID {item.product_id}. Please adjust your cart."
                     )
+            return order_id
 
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            raise e
-            flash(str(e), "error")
-            return redirect(url_for('checkout_page'))
-
-        finally:
-            conn.close()
+        order_id = await run_async(run_write, place_order)
+        # Committed: only now drop the cached stock of what was bought
+        for item in items:
+            catalog_cache.invalidate(item.product_id)
         
         # 7. Clear the cart after successful order
-        CartRepository.clear_cart(user_id)
-        if 'cart' in session:
-            session.pop('cart', None)
+        await CartRepository.aclear_cart(user_id)
         
         # 8. Return success page
         return render_template(
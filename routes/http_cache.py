@@ -0,0 +1,108 @@
+import hashlib
+import inspect
+import os
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, session, make_response
+
+# Seconds a browser / front proxy may reuse an anonymous catalog page before revalidating
+CATALOG_MAX_AGE = int(os.environ.get("TRADEENGINE_CATALOG_MAX_AGE", 30))
+HTTP_CACHE_ENABLED = os.environ.get("TRADEENGINE_HTTP_CACHE", "1") == "1"
+
+# New with every start (templates may have changed); shared by preloaded workers
+_BOOT_TOKEN = str(time.time_ns())
+
+
+# ==========================================
+# Validators
+# ==========================================
+def parse_timestamp(value):
+    # CURRENT_TIMESTAMP text ('YYYY-MM-DD HH:MM:SS', UTC) -> aware datetime
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value)[:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def _etag(parts):
+    # Logged-in pages greet the user: who is looking is part of the page
+    viewer = (session.get('user_id'), session.get('username'), session.get('role'))
+    raw = repr((_BOOT_TOKEN, request.full_path, viewer, parts))
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return bool(last_modified and since and last_modified <= since)
+
+
+def _add_headers(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    if session.get('user_id'):
+        # Personalized: the browser may keep it but must revalidate every time
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = CATALOG_MAX_AGE
+    return response
+
+
+# ==========================================
+# Decorator
+# ==========================================
+def conditional_page(validators):
+    """
+    Conditional GET for a catalog view. validators(**view_args) returns
+    (parts, last_modified): parts is any repr-able value that changes whenever
+    the page would (catalog / product / review versions), or None when it
+    cannot be determined. It runs before the view, so a matching
+    If-None-Match / If-Modified-Since is answered with 304 without loading
+    anything else. Anonymous pages are marked public for front proxies.
+    """
+    def resolve(kwargs):
+        # Pending flash messages are rendered once: never skip or share that page
+        if not HTTP_CACHE_ENABLED or request.method != 'GET' or '_flashes' in session:
+            return None, None, None
+        parts, last_modified = validators(**kwargs)
+        if parts is None:
+            return None, None, None
+
+        etag = _etag(parts)
+        if _not_modified(etag, last_modified):
+            response = _add_headers(make_response('', 304), etag, last_modified)
+            return etag, last_modified, response
+        return etag, last_modified, None
+
+    def finish(rv, etag, last_modified):
+        response = make_response(rv)
+        if etag and response.status_code == 200:
+            _add_headers(response, etag, last_modified)
+        return response
+
+    def decorate(view):
+        if inspect.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(**kwargs):
+                etag, last_modified, not_modified = resolve(kwargs)
+                if not_modified is not None:
+                    return not_modified
+                return finish(await view(**kwargs), etag, last_modified)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(**kwargs):
+            etag, last_modified, not_modified = resolve(kwargs)
+            if not_modified is not None:
+                return not_modified
+            return finish(view(**kwargs), etag, last_modified)
+        return wrapper
+
+    return decorate
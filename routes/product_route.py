@@ -1,43 +1,194 @@
+import asyncio
 from flask import Blueprint, render_template, session, request, redirect, url_for, flash, abort
-from Database.Repositories.product_repo import ProductRepository
+from Database.Repositories.product_repo import ProductRepository, ALLOWED_SORT_COLUMNS, ALLOWED_SORT_TYPES
 from Database.Repositories.review_repo import ReviewRepository
 from Database.Repositories.order_repo import OrderRepository
 from models.review_model import Review
+from Database.catalog_cache import catalog_cache
+from routes.http_cache import conditional_page, parse_timestamp
+from routes import cart_routes
+from markupsafe import Markup
 import json
 
 review_repo = ReviewRepository()
 
 shop_bp = Blueprint('shop', __name__)
 
+# ==========================================
+# HTTP Validators (304 before any catalog query)
+# ==========================================
+def _catalog_validators(**view_args):
+    # Listing pages change only with the catalog
+    version, changed_at = ProductRepository.get_catalog_version()
+    if version is None:
+        return None, None
+    return ('catalog', version), parse_timestamp(changed_at)
+
+def _product_validators(product_id):
+    version, changed_at = ProductRepository.get_product_version(product_id)
+    reviews = review_repo.get_review_version(product_id)
+    if version is None or reviews is None:
+        return None, None
+    stamps = [t for t in (parse_timestamp(changed_at), parse_timestamp(reviews[2])) if t]
+    return ('product', version, reviews), max(stamps, default=None)
+
+# ==========================================
+# Rendered Fragments (served from the catalog cache)
+# ==========================================
+@shop_bp.app_template_global()
+def product_card(product):
+    # A card is a pure function of the product's fields, so the key is the
+    # fields themselves: never stale, nothing to invalidate, LRU-evicted.
+    return catalog_cache.get(
+        ("fragment", "card", product.fingerprint()),
+        lambda: Markup(render_template('partials/product_card.html', product=product, highlights=None))
+    )
+
+def _category_section(summary, sort_by, order):
+    # One home page section (heading, counts, first page of cards). A "list"
+    # entry: dropped with the catalog lists on every product change, and the
+    # page is loaded inside the loader, so a section never outlives its data.
+    def render():
+        products, next_cursor = ProductRepository.get_products_by_category_page(
+            summary.name, ordered_by=sort_by, sort_type=order
+        )
+        if not products:
+            return None
+        next_page = None
+        if next_cursor:
+            next_page = url_for('shop.category_page', category=summary.name, sort=sort_by,
+                                order=order, after=next_cursor)
+        return Markup(render_template('partials/category_section.html', category=summary.name, summary=summary,
+                                      products=products, highlights=None, next_page=next_page))
+
+    return catalog_cache.get(("list", "fragment", "home", summary.name, sort_by, order), render)
+
 # ==========================================
 # Home Page (Product Display)
 # ==========================================
 @shop_bp.route('/')
+@conditional_page(_catalog_validators)
 def home():
     username = session.get('username', 'Guest')
     
     search_query = request.args.get('search')
     sort_by = request.args.get('sort', 'created_at')
     order = request.args.get('order', 'DESC')
+    # Unknown values sort like the defaults; normalized so they share one cached fragment
+    if sort_by not in ALLOWED_SORT_COLUMNS: sort_by = 'created_at'
+    if order not in ALLOWED_SORT_TYPES: order = 'DESC'
     
-    products = []
+    sections = []
 
     if search_query:
-        products = ProductRepository.search_products(search_query)
-        categorized_products = {'Search Results': products} if products else {}
+        # Full-text search, best matches first; "load more" continues from the cursor
+        hits, next_cursor = ProductRepository.search_catalog(search_query, after=request.args.get('after'))
+        products = [hit.product for hit in hits]
+        highlights = {hit.product.id: hit for hit in hits}
+        next_page = url_for('shop.home', search=search_query, after=next_cursor) if next_cursor else None
+
+        if request.args.get('partial'):
+            return render_template('partials/product_page.html', products=products,
+                                   highlights=highlights, next_page=next_page)
+
+        # Highlights differ per query: rendered live
+        if products:
+            sections.append(Markup(render_template(
+                'partials/category_section.html', category='Search Results', summary=None,
+                products=products, highlights=highlights, next_page=next_page
+            )))
     else:
-        products = ProductRepository.get_all_products(ordered_by=sort_by, sort_type=order)
-        categorized_products = {}
-        for product in products:
-            cat = product.category
-            if cat not in categorized_products:
-                categorized_products[cat] = []
-            categorized_products[cat].append(product)
+        # First keyset page of every category, pre-rendered: cost grows with the
+        # number of categories, not with the size of the catalog
+        for summary in ProductRepository.get_category_summaries():
+            section = _category_section(summary, sort_by, order)
+            if section:
+                sections.append(section)
 
     return render_template(
         'index.html',
         user=username,
-        categorized_products=categorized_products,
+        sections=sections,
+        current_sort=sort_by,
+        current_order=order
+    )
+
+# ==========================================
+# Category Page (one keyset page, "load more" cursors)
+# ==========================================
+@shop_bp.route('/category/<path:category>')
+@conditional_page(_catalog_validators)
+def category_page(category):
+    sort_by = request.args.get('sort', 'created_at')
+    order = request.args.get('order', 'DESC')
+
+    products, next_cursor = ProductRepository.get_products_by_category_page(
+        category, ordered_by=sort_by, sort_type=order, after=request.args.get('after')
+    )
+
+    next_page = None
+    if next_cursor:
+        next_page = url_for('shop.category_page', category=category, sort=sort_by,
+                            order=order, after=next_cursor)
+
+    # "Load more" fetches just the next page's cards
+    template = 'partials/product_page.html' if request.args.get('partial') else 'category.html'
+    return render_template(
+        template,
+        category=category,
+        summary=ProductRepository.get_category_summary(category),
+        products=products,
+        next_page=next_page,
+        current_sort=sort_by,
+        current_order=order
+    )
+
+# ==========================================
+# Filter Page (price range + attribute facets)
+# ==========================================
+def _price_arg(name):
+    try:
+        return float(request.args[name]) if request.args.get(name) else None
+    except ValueError:
+        return None
+
+@shop_bp.route('/filter')
+@conditional_page(_catalog_validators)
+def filter_page():
+    # ?category=Drills&min_price=100&max_price=500&attr.brand=Bosch&attr.brand=Makita
+    category = request.args.get('category') or None
+    price_range = (_price_arg('min_price'), _price_arg('max_price'))
+    attrs = {key[len('attr.'):]: request.args.getlist(key)
+             for key in request.args if key.startswith('attr.')}
+    sort_by = request.args.get('sort', 'created_at')
+    order = request.args.get('order', 'DESC')
+
+    result = ProductRepository.filter_products(
+        category=category, price_range=price_range, attrs=attrs,
+        ordered_by=sort_by, sort_type=order, after=request.args.get('after')
+    )
+
+    next_page = None
+    if result.next_cursor:
+        args = request.args.to_dict(flat=False)
+        args.pop('partial', None)
+        args['after'] = result.next_cursor
+        next_page = url_for('shop.filter_page', **args)
+
+    if request.args.get('partial'):
+        return render_template('partials/product_page.html', products=result.products, next_page=next_page)
+
+    selected = {name.strip().lower(): set(values) for name, values in attrs.items()}
+    return render_template(
+        'filter.html',
+        products=result.products,
+        facets=result.facets,
+        selected=selected,
+        categories=ProductRepository.get_category_summaries(),
+        category=category,
+        min_price=request.args.get('min_price', ''),
+        max_price=request.args.get('max_price', ''),
+        next_page=next_page,
         current_sort=sort_by,
         current_order=order
     )
@@ -82,57 +233,23 @@ def add_review(product_id):
 # ==========================================
 @shop_bp.route('/add_to_cart/<int:product_id>')
 def add_to_cart(product_id):
-    if 'user_id' not in session:
-        flash("Please login to add items to cart.", "error")
-        return redirect(url_for('auth.login'))
-
-    quantity = int(request.args.get('quantity', 1))
-    product = ProductRepository.get_product_by_id(product_id)
-    
-    if product and product.is_in_stock():
-        if quantity > product.stock_quantity:
-            flash(f"Only {product.stock_quantity} items available in stock.", "error")
-            return redirect(request.referrer or url_for('shop.home'))
-        
-        if 'cart' not in session:
-            session['cart'] = {}
-        
-        cart = session['cart']
-        str_id = str(product_id)
-
-        if str_id in cart:
-            new_quantity = cart[str_id]['quantity'] + quantity
-
-            if new_quantity > product.stock_quantity:
-                flash(f"Cannot add more. Only {product.stock_quantity} items available.", "error")
-                return redirect(request.referrer or url_for('shop.home'))
-            
-            cart[str_id]['quantity'] = new_quantity
-            flash(f"Updated {product.name} quantity in cart!", "success")
-        else:
-            item_data = product.to_dict()
-            item_data['quantity'] = quantity
-            cart[str_id] = item_data
-            flash(f"{product.name} added to cart!", "success")
-
-        session['cart'] = cart
-        session.modified = True
-    else:
-        flash("Product out of stock or not found.", "error")
-
-    return redirect(request.referrer or url_for('shop.home'))
+    # Old URL: same server-side cart as /cart/add (nothing is kept in the session)
+    return cart_routes.add_to_cart(product_id)
 
 # ==========================================
 # Product Detail Page
 # ==========================================
 @shop_bp.route('/product/<int:product_id>', endpoint='product_detail')
-def product_detail_view(product_id):
-    product = ProductRepository.get_product_by_id(product_id)
+@conditional_page(_product_validators)
+async def product_detail_view(product_id):
+    # Product and reviews are independent: fetch them concurrently
+    product, reviews = await asyncio.gather(
+        ProductRepository.aget_product_by_id(product_id),
+        review_repo.aget_reviews_by_product(product_id)
+    )
     if not product:
         abort(404)
 
-    reviews = review_repo.get_reviews_by_product(product_id)
-
     if reviews:
         avg_rating = sum(r.rating for r in reviews) / len(reviews)
         reviews_count = len(reviews)
@@ -158,7 +275,12 @@ def my_orders():
         return redirect(url_for('auth.login'))
     
     user_id = session['user_id']
-    raw_orders = OrderRepository.get_user_orders(user_id)
+    # Recent orders by default; a date range also searches the archived months
+    since = request.args.get('since') or None
+    until = request.args.get('until') or None
+    raw_orders = OrderRepository.get_user_orders(user_id, since=since, until=until)
+    # Items of every order in one batch instead of one query per order
+    details = OrderRepository.get_order_details_by_ids(row['id'] for row in raw_orders)
     
     orders_data = []
     
@@ -170,7 +292,7 @@ def my_orders():
         except Exception:
             shipping_info = {}
         
-        items = OrderRepository.get_order_details(order_id)
+        items = details.get(order_id, [])
         
         orders_data.append({
             'id': order_id,
@@ -182,6 +304,6 @@ def my_orders():
             'products': items
         })
     
-    return render_template('orders.html', orders=orders_data)
+    return render_template('orders.html', orders=orders_data, since=since or '', until=until or '')
 
 